@@ -0,0 +1,78 @@
+"""
+Compare convex_hull (Graham scan over a list of tuples) with the vectorized
+convex_hull_array, with and without the Akl-Toussaint prefilter and Chan's method,
+and with GEOS through shapely for reference, from 10^3 to 10^7 points of a
+benchmarks.workloads workload. The list-based function is skipped above
+--legacy-limit points.
+
+Usage:
+    python -m benchmarks.bench_convex_hull --workload gps
+"""
+
+import argparse
+import time
+import warnings
+
+import shapely
+
+from benchmarks import workloads
+from geospatial_algos import convex_hull
+
+LEGACY_LIMIT = 100_000
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6, 10**7]
+    )
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    parser.add_argument("--legacy-limit", type=int, default=LEGACY_LIMIT)
+    args = parser.parse_args()
+    # convex_hull divides by zero on points level with the anchor
+    warnings.simplefilter("ignore")
+
+    modes = {
+        "array s": {},
+        "prefilter s": {"prefilter": True},
+        "chan s": {"method": "chan"},
+        "chan+prefilter s": {"method": "chan", "prefilter": True},
+    }
+    print(
+        f"{'points':>10} {'hull':>6} {'list s':>8} "
+        + " ".join(f"{mode:>{max(len(mode), 8)}}" for mode in modes)
+        + f" {'shapely s':>9}"
+    )
+    for size in args.sizes:
+        points = workloads.make_points(args.workload, size)
+        hull = convex_hull.convex_hull_array(points, return_indices=True)
+        if size <= args.legacy_limit:
+            point_list = [tuple(point) for point in points.tolist()]
+            legacy = f"{timed(lambda: convex_hull.convex_hull(point_list)):>8.3f}"
+        else:
+            legacy = f"{'-':>8}"
+        mode_seconds = [
+            timed(lambda: convex_hull.convex_hull_array(points, **kwargs))
+            for kwargs in modes.values()
+        ]
+        shapely_seconds = timed(
+            lambda: shapely.convex_hull(shapely.multipoints(points))
+        )
+        print(
+            f"{size:>10} {len(hull):>6} {legacy} "
+            + " ".join(
+                f"{seconds:>{max(len(mode), 8)}.3f}"
+                for mode, seconds in zip(modes, mode_seconds)
+            )
+            + f" {shapely_seconds:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
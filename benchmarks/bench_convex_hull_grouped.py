@@ -0,0 +1,67 @@
+"""
+One hull per delivery zone per hour: a convex_hull_array call (plus a Polygon) for
+every group, against a single convex_hull_grouped call, with and without building
+all the Polygons, and against a shapely convex_hull per group for reference. The
+zones are the groups of a benchmarks.workloads workload.
+
+Usage:
+    python -m benchmarks.bench_convex_hull_grouped --groups 1000 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import shapely
+
+from benchmarks import workloads
+from geospatial_algos import convex_hull
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--groups", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    print(
+        f"{'groups':>7} {'points':>8} {'loop s':>7} {'shapely s':>9} "
+        f"{'grouped s':>9} {'+polygons s':>11} {'speed-up':>8}"
+    )
+    for group_count in args.groups:
+        points, group_ids = workloads.make_groups(args.workload, group_count)
+        # the loop gets its groups for free, so only the hulls are timed
+        order = np.argsort(group_ids, kind="stable")
+        splits = np.flatnonzero(np.diff(group_ids[order])) + 1
+        group_points = [points[group] for group in np.split(order, splits)]
+
+        loop_seconds = timed(
+            lambda: [convex_hull.convex_hull_array(group) for group in group_points]
+        )
+        shapely_seconds = timed(
+            lambda: [
+                shapely.convex_hull(shapely.multipoints(group))
+                for group in group_points
+            ]
+        )
+        grouped_seconds = timed(
+            lambda: convex_hull.convex_hull_grouped(points, group_ids)
+        )
+        polygons_seconds = timed(
+            lambda: convex_hull.convex_hull_grouped(points, group_ids).polygons()
+        )
+        print(
+            f"{group_count:>7} {len(points):>8} {loop_seconds:>7.3f} "
+            f"{shapely_seconds:>9.3f} {grouped_seconds:>9.3f} "
+            f"{polygons_seconds:>11.3f} {loop_seconds / polygons_seconds:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
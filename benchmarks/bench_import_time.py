@@ -0,0 +1,56 @@
+"""
+Cold-start cost of importing each module of the library, now that shapely and
+geojson are only loaded once a shapely-returning function is called, against the
+cost with both loaded up front as the modules used to do.
+
+Every import runs in a fresh interpreter, best of --repeats.
+
+Usage:
+    python -m benchmarks.bench_import_time --repeats 10
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODULES = ["geo_utils", "rtree", "convex_hull", "line_simplification"]
+TIMED_IMPORT = """
+import time
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(imports: str, repeats: int) -> float:
+    seconds = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMED_IMPORT.format(imports=imports)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        seconds.append(float(result.stdout))
+    return min(seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':>20} {'lazy ms':>8} {'eager ms':>9} {'saved':>6}")
+    for module in MODULES:
+        lazy = time_import(f"import geospatial_algos.{module}", args.repeats)
+        eager = time_import(
+            f"import shapely, geojson, geospatial_algos.{module}", args.repeats
+        )
+        print(
+            f"{module:>20} {lazy * 1e3:>8.1f} {eager * 1e3:>9.1f} "
+            f"{1 - lazy / eager:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
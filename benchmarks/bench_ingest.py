@@ -0,0 +1,97 @@
+"""
+Load a city's worth of point, line and polygon features into an R-tree:
+the usual loader (json.load the whole file, compute each feature's bounds in a
+Python loop, then build the index) against ingest, which streams the file in
+chunks and computes bounds per batch, from both GeoJSON and NDJSON. The features
+come from a benchmarks.workloads workload.
+
+Throughput is reported in features per second, and peak Python-side memory is
+measured in a separate run under tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_ingest --features 200000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from benchmarks import workloads
+from geospatial_algos import ingest, rtree
+
+
+def _flatten(coordinates) -> list:
+    if isinstance(coordinates[0], (int, float)):
+        return [coordinates]
+    return [position for part in coordinates for position in _flatten(part)]
+
+
+def load_whole_file(path: str) -> rtree.ArrayIndex:
+    with open(path) as f:
+        collection = json.load(f)
+    labels, bounds = [], []
+    for feature in collection["features"]:
+        positions = _flatten(feature["geometry"]["coordinates"])
+        xs, ys = [x for x, *_ in positions], [y for _, y, *_ in positions]
+        labels.append(feature["properties"]["name"])
+        bounds.append((min(xs), min(ys), max(xs), max(ys)))
+    return rtree.ArrayIndex.bulk_load(labels, np.array(bounds))
+
+
+def measure(func: Callable[[], object]) -> tuple[float, int]:
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--features", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=ingest.BATCH_SIZE)
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    features = workloads.make_features(args.workload, args.features)
+    with tempfile.TemporaryDirectory() as directory:
+        geojson_path = os.path.join(directory, "city.geojson")
+        ndjson_path = os.path.join(directory, "city.ndjson")
+        with open(geojson_path, "w") as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f)
+        with open(ndjson_path, "w") as f:
+            f.writelines(json.dumps(feature) + "\n" for feature in features)
+        del features
+        megabytes = os.path.getsize(geojson_path) / 2**20
+        print(f"{args.features} features, {megabytes:.0f} MiB of GeoJSON")
+
+        print(f"{'loader':>22} {'s':>8} {'features/s':>11} {'peak MiB':>9}")
+        for name, func in [
+            ("json.load + loop", lambda: load_whole_file(geojson_path)),
+            (
+                "ingest geojson",
+                lambda: ingest.ingest(geojson_path, batch_size=args.batch_size),
+            ),
+            (
+                "ingest ndjson",
+                lambda: ingest.ingest(ndjson_path, batch_size=args.batch_size),
+            ),
+        ]:
+            seconds, peak_bytes = measure(func)
+            print(
+                f"{name:>22} {seconds:>8.2f} {args.features / seconds:>11.0f} "
+                f"{peak_bytes / 2**20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
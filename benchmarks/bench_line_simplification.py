@@ -0,0 +1,100 @@
+"""
+Simplify a night's worth of GPS trips from benchmarks.workloads: simplify on one
+LineString at a time, against simplify_many over ragged coordinate/offset arrays
+(in-process and across a pool), and against shapely's vectorized simplify for
+reference. Visvalingam–Whyatt is timed as the one-off importance pass plus the
+per-tolerance threshold it leaves behind, and SimplificationCache as a cold pass
+followed by warm passes at other epsilons.
+
+Usage:
+    python -m benchmarks.bench_line_simplification --trips 20000 --workers 2 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+import shapely
+
+from benchmarks import workloads
+from geospatial_algos import line_simplification
+
+# distances in GPS steps (areas in squared steps), so each trip is simplified as much
+# as before the trips were moved onto lon/lat
+STEP = workloads.GPS_STEP
+EPSILON = 2.0 * STEP
+# zoom levels served from a single Visvalingam–Whyatt importance pass
+VW_TOLERANCES = [tolerance * STEP**2 for tolerance in [0.5, 2.0, 8.0, 32.0]]
+# epsilons the cache answers after its first pass, as a tile server would
+CACHE_EPSILONS = [epsilon * STEP for epsilon in [0.5, 2.0, 8.0]]
+# one-at-a-time simplify is timed on this many trips and scaled up
+LOOP_SAMPLE = 2_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trips", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    coords, offsets = workloads.make_trips(args.workload, args.trips)
+    print(f"{args.trips} trips, {len(coords)} points, epsilon {EPSILON}")
+    print(f"{'mode':>26} {'s':>8} {'µs/trip':>8} {'points kept':>11}")
+
+    def report(name: str, seconds: float, kept: str) -> None:
+        print(
+            f"{name:>26} {seconds:>8.3f} {seconds / args.trips * 1e6:>8.1f} "
+            f"{kept:>11}"
+        )
+
+    sample = min(LOOP_SAMPLE, args.trips)
+    lines = [
+        shapely.LineString(coords[start:end])
+        for start, end in zip(offsets[:sample], offsets[1 : sample + 1])
+    ]
+    start = time.perf_counter()
+    for line in lines:
+        line_simplification.simplify(line, EPSILON)
+    scale = args.trips / sample
+    report("loop simplify (scaled)", (time.perf_counter() - start) * scale, "-")
+
+    for workers in [None, *args.workers]:
+        start = time.perf_counter()
+        simplified, _ = line_simplification.simplify_many(
+            coords, offsets, EPSILON, workers=workers
+        )
+        name = f"simplify_many x{workers}" if workers else "simplify_many"
+        report(name, time.perf_counter() - start, str(len(simplified)))
+
+    start = time.perf_counter()
+    line_ids = np.repeat(np.arange(args.trips), np.diff(offsets))
+    geos_lines = shapely.simplify(
+        shapely.linestrings(coords, indices=line_ids), EPSILON, preserve_topology=False
+    )
+    kept = int(shapely.get_num_coordinates(geos_lines).sum())
+    report("shapely.simplify", time.perf_counter() - start, str(kept))
+
+    cache = line_simplification.SimplificationCache()
+    for idx, epsilon in enumerate([EPSILON, *CACHE_EPSILONS]):
+        start = time.perf_counter()
+        for line in lines:
+            cache.simplify(line, epsilon)
+        name = f"cache {'warm' if idx else 'cold'} {epsilon:g} (scaled)"
+        report(name, (time.perf_counter() - start) * scale, "-")
+
+    start = time.perf_counter()
+    importance = [
+        line_simplification.visvalingam_importance(coords[start:end])
+        for start, end in zip(offsets[:sample], offsets[1 : sample + 1])
+    ]
+    report("vw importance (scaled)", (time.perf_counter() - start) * scale, "-")
+    importance = np.concatenate(importance)
+    for tolerance in VW_TOLERANCES:
+        start = time.perf_counter()
+        kept = int(np.count_nonzero(importance > tolerance) * scale)
+        report(f"vw threshold {tolerance:g}", time.perf_counter() - start, str(kept))
+
+
+if __name__ == "__main__":
+    main()
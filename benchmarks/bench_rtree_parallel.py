@@ -0,0 +1,55 @@
+"""
+Query throughput of rtree.ParallelIndex at 1, 2, 4 and 8 workers, against a single
+process answering the same batch with ArrayIndex.search_many and one query at a
+time with ArrayIndex.search_ids. Throughput can't scale past the number of cores.
+
+Usage:
+    python -m benchmarks.bench_rtree_parallel --size 200000 --queries 50000
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks import workloads
+from geospatial_algos import rtree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    boxes = workloads.make_boxes(args.workload, args.size)
+    index = rtree.ArrayIndex.bulk_load(
+        [str(label) for label in range(args.size)], boxes, max_children=16
+    )
+    queries = workloads.make_queries(args.workload, args.size, args.queries)
+    print(f"{os.cpu_count()} cores, {args.size} entries, {args.queries} queries")
+    print(f"{'mode':>18} {'s':>7} {'queries/s':>10} {'hits':>8}")
+
+    def report(name: str, seconds: float, hits: int) -> None:
+        print(f"{name:>18} {seconds:>7.3f} {args.queries / seconds:>10.0f} {hits:>8}")
+
+    start = time.perf_counter()
+    hits = sum(len(index.search_ids(query)) for query in queries.tolist())
+    report("loop search_ids", time.perf_counter() - start, hits)
+
+    start = time.perf_counter()
+    _, entries = index.search_many(queries)
+    report("search_many", time.perf_counter() - start, len(entries))
+
+    for workers in args.workers:
+        with rtree.ParallelIndex(index, workers=workers) as parallel:
+            # warm up, so pool start-up isn't counted
+            parallel.search_many(queries[: workers * rtree.SHARDS_PER_WORKER])
+            start = time.perf_counter()
+            _, entries = parallel.search_many(queries)
+            report(f"{workers} workers", time.perf_counter() - start, len(entries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Cold-start cost of getting a ready-to-query index into a fresh worker: unpickling
+Node-based and array-based indexes against ArrayIndex.open, with and without mmap.
+
+Usage:
+    python -m benchmarks.bench_rtree_persistence --size 100000
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import workloads
+from geospatial_algos import rtree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    xy = workloads.make_points(args.workload, args.size)
+    points = np.hstack([xy, xy])
+    labels = [f"poi {i}" for i in range(args.size)]
+    query = tuple(workloads.make_queries(args.workload, args.size, 1)[0].tolist())
+    directory = tempfile.mkdtemp()
+
+    def report(name: str, path: str, load) -> None:
+        start = time.perf_counter()
+        index = load()
+        load_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        hits = len(index.search(query))
+        query_seconds = time.perf_counter() - start
+        print(
+            f"{name:>18} {os.path.getsize(path) / 2**20:>8.1f} "
+            f"{load_seconds * 1e3:>9.1f} {query_seconds * 1e3:>12.2f} {hits:>5}"
+        )
+
+    print(f"{'format':>18} {'MiB':>8} {'load ms':>9} {'1st query ms':>12} {'hits':>5}")
+
+    node_path = os.path.join(directory, "nodes.pickle")
+    with open(node_path, "wb") as file:
+        pickle.dump(rtree.Index.bulk_load(labels, points, max_children=16), file)
+    report("Index pickle", node_path, lambda: pickle.load(open(node_path, "rb")))
+
+    index = rtree.ArrayIndex.bulk_load(labels, points, max_children=16)
+    array_path = os.path.join(directory, "arrays.pickle")
+    with open(array_path, "wb") as file:
+        pickle.dump(index, file)
+    report("ArrayIndex pickle", array_path, lambda: pickle.load(open(array_path, "rb")))
+
+    saved_path = os.path.join(directory, "arrays.idx")
+    index.save(saved_path)
+    report(
+        "open(mmap=False)",
+        saved_path,
+        lambda: rtree.ArrayIndex.open(saved_path, mmap=False),
+    )
+    report("open(mmap=True)", saved_path, lambda: rtree.ArrayIndex.open(saved_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare the split policies of rtree.ArrayIndex across fan-outs: build time, tree
+height, how many nodes a query has to visit on average, and the per-query cost of
+one-at-a-time search against the batched search_many.
+
+Usage:
+    python -m benchmarks.bench_rtree_splits --size 20000 --fan-outs 4 8 16
+"""
+
+import argparse
+import time
+
+from benchmarks import workloads
+from geospatial_algos import rtree
+
+QUERY_COUNT = 500
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--fan-outs", type=int, nargs="+", default=[4, 8, 16])
+    # like POIs bunched in a few neighbourhoods
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="clustered")
+    args = parser.parse_args()
+
+    boxes = workloads.make_boxes(args.workload, args.size)
+    labels = [str(label) for label in range(args.size)]
+    query_array = workloads.make_queries(args.workload, args.size, QUERY_COUNT)
+    queries = query_array.tolist()
+
+    print(
+        f"{'split':>10} {'M':>3} {'build s':>8} {'height':>6} {'nodes':>7} "
+        f"{'visits/query':>12} {'search µs':>10} {'batch µs':>9}"
+    )
+    for max_children in args.fan_outs:
+        for split in [*rtree.SPLITS, "str bulk"]:
+            start = time.perf_counter()
+            if split == "str bulk":
+                index = rtree.ArrayIndex.bulk_load(labels, boxes, max_children)
+            else:
+                index = rtree.ArrayIndex(max_children, split=split)
+                for label, bounds in zip(labels, boxes.tolist()):
+                    index.insert(label, bounds)
+            build_seconds = time.perf_counter() - start
+
+            visits = 0
+            start = time.perf_counter()
+            for query in queries:
+                index.search_ids(query)
+                visits += index.nodes_visited
+            search_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index.search_many(query_array)
+            batch_seconds = time.perf_counter() - start
+
+            print(
+                f"{split:>10} {max_children:>3} {build_seconds:>8.2f} "
+                f"{index.height:>6} {index._node_count:>7} "
+                f"{visits / QUERY_COUNT:>12.1f} "
+                f"{search_seconds / QUERY_COUNT * 1e6:>10.1f} "
+                f"{batch_seconds / QUERY_COUNT * 1e6:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the shapely Node storage of rtree.Index with the NumPy storage of
+rtree.ArrayIndex: build time, query time and memory for point datasets from
+benchmarks.workloads.
+
+Each build runs in a fresh process so the peak resident set size only reflects that
+index (GEOS allocations are invisible to tracemalloc, so RSS is used instead).
+
+Usage:
+    python -m benchmarks.bench_rtree_storage --sizes 1000 2000 20000 --workload gps
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+
+from benchmarks import workloads
+from geospatial_algos import rtree
+
+QUERY_COUNT = 100
+# scattered inserts make rtree.Index degenerate into a deep chain of nodes, so its
+# insert time grows with the dataset and bigger sizes take minutes
+NODE_STORAGE_LIMIT = 2_000
+
+
+def get_max_rss() -> int:
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(storage: str, workload: str, size: int) -> dict:
+    xy = workloads.make_points(workload, size)
+    points = np.hstack([xy, xy])
+    queries = workloads.make_queries(workload, size, QUERY_COUNT)
+    labels = [f"poi {i}" for i in range(size)]
+    index = rtree.Index() if storage == "nodes" else rtree.ArrayIndex()
+
+    rss_before = get_max_rss()
+    start = time.perf_counter()
+    for label, bounds in zip(labels, points.tolist()):
+        index.insert(label, bounds)
+    insert_seconds = time.perf_counter() - start
+    rss_after = get_max_rss()
+
+    start = time.perf_counter()
+    hits = sum(len(index.search(bounds)) for bounds in queries.tolist())
+    search_seconds = time.perf_counter() - start
+
+    return {
+        "storage": storage,
+        "size": size,
+        "insert_us": insert_seconds / size * 1e6,
+        "search_us": search_seconds / QUERY_COUNT * 1e6,
+        "rss_kb": rss_after - rss_before,
+        "hits": hits,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 2_000, 20_000])
+    parser.add_argument("--workload", choices=workloads.WORKLOADS, default="uniform")
+    args = parser.parse_args()
+
+    print(
+        f"{'storage':>8} {'size':>8} {'insert µs':>10} {'search µs':>10} "
+        f"{'rss KiB':>9} {'hits':>7}"
+    )
+    for size in args.sizes:
+        for storage in ("nodes", "arrays"):
+            if storage == "nodes" and size > NODE_STORAGE_LIMIT:
+                continue
+            with multiprocessing.Pool(1) as pool:
+                row = pool.apply(run, (storage, args.workload, size))
+            print(
+                f"{row['storage']:>8} {row['size']:>8} {row['insert_us']:>10.1f} "
+                f"{row['search_us']:>10.1f} {row['rss_kb']:>9} {row['hits']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
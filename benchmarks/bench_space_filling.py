@@ -0,0 +1,120 @@
+"""
+Feed the R-trees in space-filling-curve order instead of the order the data came
+in: inserting entries sorted along the Hilbert or Morton curve, bulk loading with
+Hilbert packing instead of STR, and running a batch of queries sorted along the
+curve so consecutive queries walk the same nodes.
+
+Each tree is scored by build time, the nodes a query visits on average (the
+locality of its nodes) and the time per query, best of REPEATS runs.
+
+Usage:
+    python -m benchmarks.bench_space_filling --size 10000 --workload clustered
+"""
+
+import argparse
+import time
+from typing import Callable, Union
+
+import numpy as np
+
+from benchmarks import workloads
+from geospatial_algos import rtree, space_filling
+
+QUERY_COUNT = 2000
+REPEATS = 3
+# the Node-based Index inserts too slowly for the full size
+NODE_INSERT_LIMIT = 2000
+
+
+def timed(func: Callable[[], object]) -> tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def insert_all(
+    index: Union[rtree.Index, rtree.ArrayIndex], bounds: np.ndarray, order: np.ndarray
+) -> Union[rtree.Index, rtree.ArrayIndex]:
+    for idx, entry_bounds in zip(order.tolist(), bounds[order].tolist()):
+        index.insert(str(idx), entry_bounds)
+    return index
+
+
+def score(
+    index: Union[rtree.Index, rtree.ArrayIndex], queries: np.ndarray
+) -> tuple[float, float]:
+    """Mean nodes visited and microseconds per query, best of REPEATS."""
+    search = index.search_ids if isinstance(index, rtree.ArrayIndex) else index.search
+    best = np.inf
+    for _ in range(REPEATS):
+        visited = 0
+        start = time.perf_counter()
+        for query in queries.tolist():
+            search(query)
+            visited += index.nodes_visited
+        best = min(best, time.perf_counter() - start)
+    return visited / len(queries), best / len(queries) * 1e6
+
+
+def orders(size: int, bounds: np.ndarray) -> list[tuple[str, np.ndarray]]:
+    return [
+        ("arbitrary", np.arange(size)),
+        ("hilbert", space_filling.curve_order(bounds[:size], "hilbert")),
+        ("morton", space_filling.curve_order(bounds[:size], "morton")),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument(
+        "--workload", choices=workloads.WORKLOADS[:2], default="uniform"
+    )
+    parser.add_argument("--queries", type=int, default=QUERY_COUNT)
+    args = parser.parse_args()
+
+    bounds = workloads.make_boxes(args.workload, args.size)
+    queries = workloads.make_queries(args.workload, args.size, args.queries)
+    labels = [str(idx) for idx in range(args.size)]
+    print(f"{args.size} {args.workload} boxes, {args.queries} queries")
+
+    header = f"{'':>30} {'build s':>8} {'visited':>8} {'µs/query':>9}"
+    print(f"\ninsert order\n{header}")
+    node_size = min(args.size, NODE_INSERT_LIMIT)
+    for name, make_index, size in [
+        ("Index", rtree.Index, node_size),
+        ("ArrayIndex(8)", lambda: rtree.ArrayIndex(8), args.size),
+    ]:
+        for order_name, order in orders(size, bounds):
+            index, seconds = timed(lambda: insert_all(make_index(), bounds, order))
+            visited, micros = score(index, queries)
+            label = f"{name} x{size} {order_name}"
+            print(f"{label:>30} {seconds:>8.2f} {visited:>8.1f} {micros:>9.1f}")
+
+    print(f"\nbulk_load packing\n{header}")
+    for name, cls, max_children in [
+        ("Index(8)", rtree.Index, 8),
+        ("ArrayIndex(8)", rtree.ArrayIndex, 8),
+    ]:
+        for packing in rtree.PACKINGS:
+            index, seconds = timed(
+                lambda: cls.bulk_load(labels, bounds, max_children, packing=packing)
+            )
+            visited, micros = score(index, queries)
+            label = f"{name} {packing}"
+            print(f"{label:>30} {seconds:>8.3f} {visited:>8.1f} {micros:>9.1f}")
+
+    print(f"\nquery order, ArrayIndex(8) str\n{'':>30} {'µs/query':>9}")
+    index = rtree.ArrayIndex.bulk_load(labels, bounds, 8)
+    for order_name, order in orders(len(queries), queries):
+        ordered = queries[order]
+        _, micros = score(index, ordered)
+        seconds = min(
+            timed(lambda: index.search_many(ordered))[1] for _ in range(REPEATS)
+        )
+        print(f"{'search_ids ' + order_name:>30} {micros:>9.1f}")
+        print(f"{'search_many ' + order_name:>30} {seconds / len(queries) * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two result files written by benchmarks.run, case by case, and flag the
+ones that got slower (or used more memory) by more than --threshold. Slowdowns
+smaller than --min-seconds are put down to timer noise. Exits with status 1 if
+anything regressed, so it can gate a deploy.
+
+Usage:
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict[tuple[str, str, int], dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {
+        (row["case"], row["workload"], row["size"]): row for row in report["results"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative increase in best time or peak memory that counts as a "
+        "regression",
+    )
+    parser.add_argument("--min-seconds", type=float, default=0.005)
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    regressions = 0
+    print(
+        f"{'case':>30} {'workload':>9} {'size':>8} {'before s':>9} {'after s':>9} "
+        f"{'time':>7} {'memory':>7}"
+    )
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        time_ratio = after["seconds"] / before["seconds"]
+        memory_ratio = after["peak_bytes"] / max(before["peak_bytes"], 1)
+        slower = after["seconds"] - before["seconds"] > args.min_seconds
+        regressed = (slower and time_ratio > 1 + args.threshold) or (
+            memory_ratio > 1 + args.threshold
+        )
+        regressions += regressed
+        case, workload, size = key
+        print(
+            f"{case:>30} {workload:>9} {size:>8} {before['seconds']:>9.4f} "
+            f"{after['seconds']:>9.4f} {time_ratio:>6.2f}x {memory_ratio:>6.2f}x"
+            + ("  REGRESSION" if regressed else "")
+        )
+
+    for name, only in [
+        ("baseline", baseline.keys() - candidate.keys()),
+        ("candidate", candidate.keys() - baseline.keys()),
+    ]:
+        if only:
+            print(f"{len(only)} results only in the {name}, not compared")
+    print(f"{regressions} regressions above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
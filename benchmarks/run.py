@@ -0,0 +1,188 @@
+"""
+Benchmark the hot paths of rtree, convex_hull and line_simplification on the
+uniform, clustered and GPS-trace workloads of benchmarks.workloads, at several
+sizes, and write the timings and peak memory to a JSON file that
+benchmarks.compare can check against another run.
+
+Each case is timed --repeats times (best and mean are kept), then run once more
+under tracemalloc for its peak Python-side allocation. Setup (bulk loading the index
+to search, converting inputs) is never timed. Cases known to be slow at large sizes
+have a size limit and are skipped beyond it.
+
+Usage:
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --sizes 1000 10000 --cases rtree.Index.search
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import shapely
+
+from benchmarks import workloads
+from geospatial_algos import convex_hull, line_simplification, rtree
+
+QUERY_COUNT = 100
+# about 10 m, in degrees
+SIMPLIFY_EPSILON = 0.0001
+# scattered inserts make rtree.Index degenerate into a deep chain of nodes, and
+# one-at-a-time inserts into ArrayIndex cost around a millisecond each
+NODE_INSERT_LIMIT = 2_000
+ARRAY_INSERT_LIMIT = 10_000
+LEGACY_HULL_LIMIT = 100_000
+
+
+class Case(NamedTuple):
+    # takes the workload name and size, returns the function to time (which must
+    # leave its inputs as it found them, since it is called repeatedly)
+    setup: Callable[[str, int], Callable[[], object]]
+    limit: Optional[int] = None
+
+
+def _build(index_type: type, boxes: list[list[float]]):
+    index = index_type()
+    for idx, bounds in enumerate(boxes):
+        index.insert(str(idx), bounds)
+    return index
+
+
+def _insert(index_type: type) -> Callable[[str, int], Callable[[], object]]:
+    def setup(workload: str, size: int) -> Callable[[], object]:
+        boxes = workloads.make_boxes(workload, size).tolist()
+        return lambda: _build(index_type, boxes)
+
+    return setup
+
+
+def _search(index_type: type) -> Callable[[str, int], Callable[[], object]]:
+    def setup(workload: str, size: int) -> Callable[[], object]:
+        index = index_type.bulk_load(
+            [str(idx) for idx in range(size)], workloads.make_boxes(workload, size)
+        )
+        queries = workloads.make_queries(workload, size, QUERY_COUNT).tolist()
+        return lambda: [index.search(query) for query in queries]
+
+    return setup
+
+
+def _convex_hull(workload: str, size: int) -> Callable[[], object]:
+    points = workloads.make_points(workload, size).tolist()
+    return lambda: convex_hull.convex_hull(points)
+
+
+def _convex_hull_array(workload: str, size: int) -> Callable[[], object]:
+    points = workloads.make_points(workload, size)
+    return lambda: convex_hull.convex_hull_array(points)
+
+
+def _simplify(workload: str, size: int) -> Callable[[], object]:
+    line = shapely.LineString(workloads.make_points(workload, size))
+    return lambda: line_simplification.simplify(line, SIMPLIFY_EPSILON)
+
+
+CASES = {
+    "rtree.Index.insert": Case(_insert(rtree.Index), NODE_INSERT_LIMIT),
+    "rtree.Index.search": Case(_search(rtree.Index)),
+    "rtree.ArrayIndex.insert": Case(_insert(rtree.ArrayIndex), ARRAY_INSERT_LIMIT),
+    "rtree.ArrayIndex.search": Case(_search(rtree.ArrayIndex)),
+    "convex_hull.convex_hull": Case(_convex_hull, LEGACY_HULL_LIMIT),
+    "convex_hull.convex_hull_array": Case(_convex_hull_array),
+    "line_simplification.simplify": Case(_simplify),
+}
+
+
+def measure(case: Case, workload: str, size: int, repeats: int) -> dict:
+    func = case.setup(workload, size)
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": min(seconds),
+        "mean_seconds": sum(seconds) / repeats,
+        "repeats": repeats,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument(
+        "--workloads",
+        nargs="+",
+        choices=workloads.WORKLOADS,
+        default=list(workloads.WORKLOADS),
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'case':>30} {'workload':>9} {'size':>8} {'best s':>9} {'mean s':>9} "
+        f"{'peak KiB':>9}"
+    )
+    with warnings.catch_warnings():
+        # the list-based convex_hull trips NumPy's 2-D cross product deprecation
+        warnings.simplefilter("ignore", DeprecationWarning)
+        for name in args.cases:
+            case = CASES[name]
+            for workload in args.workloads:
+                for size in args.sizes:
+                    if case.limit is not None and size > case.limit:
+                        continue
+                    row = {"case": name, "workload": workload, "size": size}
+                    row.update(measure(case, workload, size, args.repeats))
+                    results.append(row)
+                    print(
+                        f"{name:>30} {workload:>9} {size:>8} {row['seconds']:>9.4f} "
+                        f"{row['mean_seconds']:>9.4f} {row['peak_bytes'] / 1024:>9.0f}"
+                    )
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "shapely": shapely.__version__,
+            "platform": platform.platform(),
+            "seed": workloads.SEED,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Synthetic, seeded workloads shared by the benchmark suite (benchmarks.run), all in
+lon/lat degrees around New York:
+
+- uniform - points spread evenly over the city
+- clustered - points bunched around a few dozen hot spots
+- gps - a single GPS trace: a random walk with small steps
+
+Every workload is derived from SEED, the workload name and the size, so two runs
+(or two machines) benchmark exactly the same data. Besides points, boxes and
+queries, each workload gives GPS trips, groups of points (one per delivery zone)
+and GeoJSON features, all built around its points.
+"""
+
+import zlib
+
+import numpy as np
+
+SEED = 0
+WORKLOADS = ("uniform", "clustered", "gps")
+BBOX = (-74.05, 40.60, -73.85, 40.85)
+CLUSTER_COUNT = 30
+CLUSTER_SPREAD = 0.005
+GPS_STEP = 0.0001
+# width and height of a query box, as a fraction of the workload's own extent, so
+# queries on a short GPS trace don't match all of it
+QUERY_FRACTION = 0.03
+# fixes per GPS trip, from the low value up to (excluding) the high one
+TRIP_SIZES = (50, 500)
+POINTS_PER_GROUP = 50
+GROUP_SPREAD = 0.001
+
+
+def _rng(workload: str, size: int, salt: str = "") -> np.random.Generator:
+    # crc32 rather than hash() so the data is the same in every process
+    return np.random.default_rng(
+        [SEED, zlib.crc32(f"{workload}:{salt}".encode()), size]
+    )
+
+
+def make_points(workload: str, size: int) -> np.ndarray:
+    """(size, 2) array of lon/lat points."""
+    assert workload in WORKLOADS, f"Unknown workload {workload}."
+    rng = _rng(workload, size)
+    mins, maxs = np.array(BBOX[:2]), np.array(BBOX[2:])
+    if workload == "uniform":
+        return rng.uniform(mins, maxs, size=(size, 2))
+    if workload == "clustered":
+        centres = rng.uniform(mins, maxs, size=(CLUSTER_COUNT, 2))
+        cluster = rng.integers(0, CLUSTER_COUNT, size)
+        return centres[cluster] + rng.normal(0, CLUSTER_SPREAD, size=(size, 2))
+    steps = rng.normal(0, GPS_STEP, size=(size, 2))
+    steps[0] = (mins + maxs) / 2
+    return np.cumsum(steps, axis=0)
+
+
+def make_boxes(workload: str, size: int) -> np.ndarray:
+    """
+    (size, 4) array of minx, miny, maxx, maxy boxes starting at the points, each up
+    to the typical spacing between points (the workload's extent over sqrt(size)).
+    """
+    points = make_points(workload, size)
+    spacing = (points.max(axis=0) - points.min(axis=0)) / np.sqrt(size)
+    extents = _rng(workload, size, "boxes").uniform(0, spacing, size=(size, 2))
+    return np.hstack([points, points + extents])
+
+
+def make_queries(workload: str, size: int, count: int) -> np.ndarray:
+    """(count, 4) array of query boxes centred on points of the workload."""
+    points = make_points(workload, size)
+    rng = _rng(workload, size, "queries")
+    extent = QUERY_FRACTION * (points.max(axis=0) - points.min(axis=0))
+    mins = points[rng.integers(0, size, count)] - extent / 2
+    return np.hstack([mins, mins + extent])
+
+
+def make_trips(workload: str, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    count GPS trips as ragged arrays: (N, 2) coordinates and count + 1 offsets, trip
+    i being coords[offsets[i] : offsets[i + 1]]. Each trip is a random walk starting
+    at one of the workload's points.
+    """
+    rng = _rng(workload, count, "trips")
+    sizes = rng.integers(*TRIP_SIZES, count)
+    offsets = np.r_[0, np.cumsum(sizes)]
+    walks = np.cumsum(rng.normal(0, GPS_STEP, size=(offsets[-1], 2)), axis=0)
+    # shift every walk so it starts at its point (walks stay small, so no precision
+    # is lost to summing lon/lat values)
+    shifts = make_points(workload, count) - walks[offsets[:-1]]
+    return walks + np.repeat(shifts, sizes, axis=0), offsets
+
+
+def make_groups(
+    workload: str, group_count: int, points_per_group: int = POINTS_PER_GROUP
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (N, 2) points and the group id of each, for group_count groups of
+    points_per_group points on average scattered around the workload's points.
+    """
+    rng = _rng(workload, group_count, "groups")
+    size = group_count * points_per_group
+    group_ids = rng.integers(0, group_count, size)
+    centres = make_points(workload, group_count)
+    return centres[group_ids] + rng.normal(0, GROUP_SPREAD, size=(size, 2)), group_ids
+
+
+def make_features(workload: str, count: int) -> list[dict]:
+    """
+    count GeoJSON features centred on the workload's points: 60% points, 25% lines
+    of 20 positions and 15% polygons of 12.
+    """
+    rng = _rng(workload, count, "features")
+    centres = make_points(workload, count)
+    kinds = rng.choice(["Point", "LineString", "Polygon"], count, p=[0.6, 0.25, 0.15])
+    features = []
+    for idx, (centre, kind) in enumerate(zip(centres, kinds)):
+        if kind == "Point":
+            coordinates = centre.round(6).tolist()
+        else:
+            size = 20 if kind == "LineString" else 12
+            steps = rng.normal(0, 5 * GPS_STEP, size=(size, 2))
+            ring = (centre + np.cumsum(steps, axis=0)).round(6).tolist()
+            coordinates = ring if kind == "LineString" else [ring + ring[:1]]
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"name": f"feature {idx}", "kind": kind},
+                "geometry": {"type": kind, "coordinates": coordinates},
+            }
+        )
+    return features
@@ -1,15 +1,48 @@
 """
+Functions:
+- convex_hull - Graham scan over a list of points, one point at a time
+- convex_hull_array - monotone chain over an (N, 2) array, with the cross products
+  computed in bulk; returns the hull as a Polygon or as indices into the array.
+  Optionally discards points that can't be on the hull first (Akl–Toussaint), or
+  uses Chan's output-sensitive algorithm
+- convex_hull_grouped - hulls of many groups of points in a single pass
+
+Classes:
+- GroupedHulls - the hull vertices of every group, with Polygons built on demand
+- IncrementalHull - a hull kept up to date as batches of points stream in
+
 Resources:
 - https://medium.com/@errazkim/computing-the-convex-hull-in-python-60a6087e0faa
 - https://medium.com/@pascal.sommer.ch/a-gentle-introduction-to-the-convex-hull-problem-62dfcabee90c
 - https://www.mathsisfun.com/sine-cosine-tangent.html
 - https://www.mathsisfun.com/algebra/vectors-cross-product.html
 - https://www.geeksforgeeks.org/check-if-given-polygon-is-a-convex-polygon-or-not/
+- Andrew, Another Efficient Algorithm for Convex Hulls in Two Dimensions (1979)
+- Akl & Toussaint, A Fast Convex Hull Algorithm (1978)
+- Chan, Optimal Output-Sensitive Convex Hull Algorithms in Two and Three Dimensions
+  (1996)
 """
 
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
 import numpy as np
 
-from .geo_utils import PointType, Polygon
+from . import geo_utils, instrumentation
+from .geo_utils import PointType
+
+if TYPE_CHECKING:
+    from .geo_utils import Polygon
+
+# stop peeling once a pass removes less than this fraction of the candidates
+PEEL_MIN_FRACTION = 0.1
+# Chan's algorithm squares its guess of the hull size, starting from this one
+CHAN_INITIAL_GROUP_SIZE = 256
+# and stops wrapping once the mini-hulls keep more than this fraction of the points
+CHAN_MAX_CANDIDATE_FRACTION = 0.5
+# turns (in radians) this close to the smallest one are compared exactly
+HULL_TURN_TOLERANCE = 1e-9
 
 
 def make_vector(point_1: PointType, point_2: PointType) -> PointType:
@@ -26,7 +59,8 @@ def check_convex(point_1: PointType, point_2: PointType, point_3: PointType) ->
     return bool(cross_product < 0)
 
 
-def convex_hull(points: list[PointType]) -> Polygon:
+def convex_hull(points: list[PointType]) -> "Polygon":
+    start = time.perf_counter() if instrumentation.enabled else 0.0
     # Find the point anchor point with the lowest y-coordinate
     # (if duplicates, choose the one with lowest x-coordinate)
     min_point = points[0]
@@ -52,6 +86,7 @@ def convex_hull(points: list[PointType]) -> Polygon:
 
     # Initialize the hull with the anchor point and the first element in the sorted list
     hull: list[PointType] = [anchor, points_by_angle[sorted_angles[0]]]
+    popped = 0
 
     # Iterate over each point in the sorted list and determine if traversing to it from
     # the prior two points in the hull results in a concave or convex shape
@@ -65,5 +100,461 @@ def convex_hull(points: list[PointType]) -> Polygon:
         else:
             hull.pop()
             hull.append(point)
+            popped += 1
+
+    if instrumentation.enabled:
+        instrumentation.record(
+            "convex_hull.convex_hull",
+            time.perf_counter() - start,
+            points_sorted=len(sorted_angles),
+            points_popped=popped,
+            hull_vertices=len(hull),
+        )
+    return geo_utils.Polygon(hull)
+
+
+def _cross(origin: np.ndarray, point_1: np.ndarray, point_2: np.ndarray) -> np.ndarray:
+    # z-component of (point_1 - origin) x (point_2 - origin), positive for a left turn
+    return (point_1[..., 0] - origin[..., 0]) * (point_2[..., 1] - origin[..., 1]) - (
+        point_1[..., 1] - origin[..., 1]
+    ) * (point_2[..., 0] - origin[..., 0])
+
+
+def _sort_points(
+    points: np.ndarray, groups: np.ndarray, group_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    Offsets of the points sorted by group, then x, then y, keeping one of each
+    duplicate point within a group. With group_size, the groups are consecutive runs
+    of that many points, so each run is sorted on its own.
+    """
+    if group_size:
+        full = len(points) // group_size * group_size
+        order = np.argsort(points[:full, 0].reshape(-1, group_size), axis=1)
+        order += np.arange(0, full, group_size)[:, None]
+        order = np.r_[order.ravel(), full + np.argsort(points[full:, 0])]
+    else:
+        order = np.argsort(points[:, 0])
+        order = order[np.argsort(groups[order], kind="stable")]
+    sorted_points, sorted_groups = points[order], groups[order]
+    same_group = sorted_groups[1:] == sorted_groups[:-1]
+    if np.any(same_group & (sorted_points[1:, 0] == sorted_points[:-1, 0])):
+        # np.lexsort is several times slower, so only break ties on y when needed
+        order = np.lexsort((points[:, 1], points[:, 0], groups))
+        sorted_points = points[order]
+
+    unique = np.ones(len(order), dtype=bool)
+    unique[1:] = ~same_group | np.any(sorted_points[1:] != sorted_points[:-1], axis=1)
+    return order[unique]
+
+
+def _right_turns(chain: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    # candidates making a right turn or going straight with their neighbours
+    turns = np.zeros(len(chain), dtype=bool)
+    turns[1:-1] = (
+        (_cross(chain[:-2], chain[1:-1], chain[2:]) <= 0)
+        & (groups[:-2] == groups[1:-1])
+        & (groups[2:] == groups[1:-1])
+    )
+    return turns
+
+
+def _chain(
+    points: np.ndarray, candidates: np.ndarray, groups: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Keep the candidates (sorted along the chain of their group) where the chain
+    turns left.
+
+    Each vectorized pass drops every candidate that makes a right turn or goes
+    straight with its current neighbours in the same group, since such a point lies
+    on or behind the segment between two other points. Once passes stop paying off,
+    a sequential stack pass finishes the groups that still have right turns.
+    """
+    while len(candidates) > 2:
+        keep = ~_right_turns(points[candidates], groups)
+        removed = len(candidates) - np.count_nonzero(keep)
+        candidates, groups = candidates[keep], groups[keep]
+        if removed < PEEL_MIN_FRACTION * len(candidates):
+            break
+
+    unfinished = np.isin(
+        groups, groups[_right_turns(points[candidates], groups)]
+    ).nonzero()[0]
+    stack: list[int] = []
+    stack_points: list[list[float]] = []
+    for position, group, (x, y) in zip(
+        unfinished.tolist(),
+        groups[unfinished].tolist(),
+        points[candidates[unfinished]].tolist(),
+    ):
+        while len(stack) >= 2 and groups[stack[-2]] == group:
+            (x_1, y_1), (x_2, y_2) = stack_points[-2], stack_points[-1]
+            if (x_2 - x_1) * (y - y_1) - (y_2 - y_1) * (x - x_1) > 0:
+                break
+            stack.pop()
+            stack_points.pop()
+        stack.append(position)
+        stack_points.append([x, y])
+
+    keep = np.ones(len(candidates), dtype=bool)
+    keep[unfinished] = False
+    keep[stack] = True
+    return candidates[keep], groups[keep]
+
+
+def _last_in_group(groups: np.ndarray) -> np.ndarray:
+    return np.r_[groups[1:] != groups[:-1], True] if len(groups) else groups == 0
+
+
+def _hulls(
+    points: np.ndarray, order: np.ndarray, groups: np.ndarray, ring: bool = True
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Monotone chain for every group at once, given the offsets from _sort_points
+    and the group of every point.
+
+    Returns the hull vertices of all groups back to back, each group's starting at
+    its lowest point (lowest x on ties) and running clockwise, along with the group
+    of every vertex. Without ring, only the vertices are found, in no given order.
+    """
+    groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(order)])
+    ends = np.repeat(starts + sizes - 1, sizes)
+    is_end = np.zeros(len(order), dtype=bool)
+    is_end[starts] = is_end[ends] = True
+
+    # the lower chain runs left to right below the line between each group's
+    # leftmost and rightmost points, the upper chain right to left above it
+    side = _cross(
+        points[order[np.repeat(starts, sizes)]], points[order[ends]], points[order]
+    )
+    lower, lower_groups = _chain(
+        points, order[(side < 0) | is_end], groups[(side < 0) | is_end]
+    )
+    upper, upper_groups = _chain(
+        points, order[(side > 0) | is_end][::-1], groups[(side > 0) | is_end][::-1]
+    )
+    # each chain ends where the other starts; a single point is only in the lower one
+    keep_lower = ~_last_in_group(lower_groups) | np.isin(
+        lower_groups, groups[starts[sizes == 1]]
+    )
+    keep_upper = ~_last_in_group(upper_groups)
+    hull = np.r_[lower[keep_lower], upper[keep_upper]]
+    hull_groups = np.r_[lower_groups[keep_lower], upper_groups[keep_upper]]
+    if not ring:
+        return hull, hull_groups
+
+    # counter-clockwise from the leftmost point, reversed to run clockwise
+    hull, hull_groups = hull[::-1], hull_groups[::-1]
+    regroup = np.argsort(hull_groups, kind="stable")
+    hull, hull_groups = hull[regroup], hull_groups[regroup]
+
+    # rotate each group's ring so it starts at the anchor
+    hull_starts = np.flatnonzero(np.r_[True, hull_groups[1:] != hull_groups[:-1]])
+    hull_sizes = np.diff(np.r_[hull_starts, len(hull)])
+    anchor_order = np.lexsort((points[hull, 0], points[hull, 1], hull_groups))
+    anchors = anchor_order[hull_starts]
+    position = np.arange(len(hull)) - np.repeat(hull_starts, hull_sizes)
+    shift = np.repeat(anchors - hull_starts, hull_sizes)
+    rotated = np.empty_like(hull)
+    rotated[
+        np.repeat(hull_starts, hull_sizes)
+        + (position - shift) % np.repeat(hull_sizes, hull_sizes)
+    ] = hull
+    return rotated, hull_groups
+
+
+def _hull(points: np.ndarray) -> np.ndarray:
+    # monotone chain over all the points as a single group
+    groups = np.zeros(len(points), dtype=np.int64)
+    return _hulls(points, _sort_points(points, groups), groups)[0]
+
+
+def _akl_toussaint(points: np.ndarray) -> np.ndarray:
+    # offsets of the points not strictly inside the quadrilateral spanned by the
+    # leftmost, lowest, rightmost and highest points, which can't be on the hull
+    corners = points[
+        [
+            np.argmin(points[:, 0]),
+            np.argmin(points[:, 1]),
+            np.argmax(points[:, 0]),
+            np.argmax(points[:, 1]),
+        ]
+    ]
+    inside = np.ones(len(points), dtype=bool)
+    for corner, next_corner in zip(corners, np.roll(corners, -1, axis=0)):
+        inside &= _cross(corner, next_corner, points) > 0
+    return np.flatnonzero(~inside)
+
+
+def _wrap(points: np.ndarray, max_steps: int) -> Optional[np.ndarray]:
+    """
+    Jarvis march over the points: from each hull vertex, the next one is the point
+    at the smallest turn from the current edge (the farthest on ties). Returns the
+    vertices counter-clockwise from the lowest point, or None when the hull has
+    more than max_steps vertices.
+    """
+    start = int(np.lexsort((points[:, 0], points[:, 1]))[0])
+    hull = [start]
+    direction = np.array([1.0, 0.0])
+    for _ in range(max_steps):
+        vectors = points - points[hull[-1]]
+        lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+        turns = np.arctan2(
+            direction[0] * vectors[:, 1] - direction[1] * vectors[:, 0],
+            vectors @ direction,
+        )
+        turns[(lengths == 0) | (turns < 0)] = np.inf
+        # settle the few near-ties exactly, so rounding in arctan2 can't skip a corner
+        tied = np.flatnonzero(turns <= turns.min() + HULL_TURN_TOLERANCE)
+        best = int(tied[0])
+        for idx in tied[1:].tolist():
+            cross = (
+                vectors[best, 0] * vectors[idx, 1] - vectors[best, 1] * vectors[idx, 0]
+            )
+            if cross < 0 or (cross == 0 and lengths[idx] > lengths[best]):
+                best = idx
+        if best == start:
+            return np.array(hull, dtype=np.int64)
+        direction = vectors[best] / lengths[best]
+        hull.append(best)
+    return None
+
+
+def _chan(points: np.ndarray) -> np.ndarray:
+    """
+    Chan's output-sensitive hull: split the points into groups of m, hull every group
+    at once, then wrap the mini-hull vertices, giving up and squaring m as soon as
+    the hull turns out to have more than m vertices.
+
+    The wrap tests every mini-hull vertex at each step in one vectorized pass
+    rather than binary searching each mini-hull for its tangent, so every round
+    carries on with just the mini-hull vertices, and once they are most of what's
+    left (most points are corners) a single monotone chain finishes the job.
+    """
+    offsets = np.arange(len(points))
+    group_size = CHAN_INITIAL_GROUP_SIZE
+    while True:
+        remaining = points[offsets]
+        if group_size >= len(offsets):
+            return offsets[_hull(remaining)]
+
+        groups = np.arange(len(offsets)) // group_size
+        order = _sort_points(remaining, groups, group_size)
+        candidates, _ = _hulls(remaining, order, groups, ring=False)
+        if len(candidates) > CHAN_MAX_CANDIDATE_FRACTION * len(offsets):
+            group_size = len(candidates)
+        else:
+            hull = _wrap(remaining[candidates], max_steps=group_size)
+            if hull is not None:
+                # counter-clockwise from the anchor, to clockwise from the anchor
+                return offsets[candidates[np.roll(hull[::-1], 1)]]
+            group_size = group_size**2
+        offsets = offsets[candidates]
+
+
+def convex_hull_array(
+    points: np.ndarray,
+    return_indices: bool = False,
+    prefilter: bool = False,
+    method: str = "monotone",
+) -> Union["Polygon", np.ndarray]:
+    """
+    Convex hull of an (N, 2) array of points.
+
+    With the default "monotone" method, points are sorted once by x (then y) and
+    the lower and upper chains are built from the points on each side of the line
+    between the leftmost and rightmost points, in O(n log n). The "chan" method is
+    output-sensitive, O(n log h) for a hull of h vertices, which pays off when there
+    are millions of points and only tens of corners.
+
+    With prefilter, points strictly inside the quadrilateral of the extreme points
+    (Akl–Toussaint) are discarded first, which leaves few points from dense clouds.
+
+    Duplicate and collinear points are dropped, so only corners are kept. Like
+    convex_hull, the vertices start at the point with the lowest y-coordinate
+    (lowest x on ties) and run clockwise. With return_indices, the vertices are
+    returned as offsets into points instead of as a Polygon, which is empty when
+    the points are all collinear.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    assert points.ndim == 2 and points.shape[1] == 2, "Points must be an (N, 2) array."
+    assert len(points) >= 3, "A hull needs at least three points."
+    assert method in ("monotone", "chan"), f"Unknown hull method {method}."
+    start = time.perf_counter() if instrumentation.enabled else 0.0
+
+    offsets = _akl_toussaint(points) if prefilter else np.arange(len(points))
+    candidates = points[offsets]
+    if method == "chan":
+        hull = _chan(candidates)
+    else:
+        hull = _hull(candidates)
+
+    hull = offsets[hull]
+    if instrumentation.enabled:
+        instrumentation.record(
+            "convex_hull.convex_hull_array",
+            time.perf_counter() - start,
+            points_sorted=len(candidates),
+            points_popped=len(candidates) - len(hull),
+            hull_vertices=len(hull),
+        )
+    if return_indices:
+        return hull
+    return geo_utils.Polygon(points[hull] if len(hull) >= 3 else None)
+
+
+class GroupedHulls(Mapping):
+    """
+    Group id -> hull Polygon for every group passed to convex_hull_grouped.
+
+    The hulls are kept as offsets into the input points: the vertices of the i-th
+    group in groups are indices[offsets[i] : offsets[i + 1]], starting at the
+    group's lowest point and running clockwise. A Polygon is only built when a
+    group is looked up, or for all groups at once with polygons. Groups whose
+    points are all collinear get an empty Polygon.
+    """
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        groups: np.ndarray,
+        indices: np.ndarray,
+        offsets: np.ndarray,
+    ) -> None:
+        self.points = points
+        self.groups = groups
+        self.indices = indices
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.groups.tolist())
+
+    def _position(self, group) -> int:
+        position = int(np.searchsorted(self.groups, group))
+        if position == len(self.groups) or self.groups[position] != group:
+            raise KeyError(group)
+        return position
+
+    def vertices(self, group) -> np.ndarray:
+        position = self._position(group)
+        return self.indices[self.offsets[position] : self.offsets[position + 1]]
+
+    def __getitem__(self, group) -> "Polygon":
+        vertices = self.vertices(group)
+        return geo_utils.Polygon(self.points[vertices] if len(vertices) >= 3 else None)
+
+    def polygons(self) -> np.ndarray:
+        """Polygons of all groups, in the order of groups, built in one call."""
+        sizes = np.diff(self.offsets)
+        polygons = np.full(len(self.groups), geo_utils.Polygon(), dtype=object)
+        rings = sizes >= 3
+        ring_vertices = np.repeat(rings, sizes)
+        polygons[rings] = geo_utils.make_polygons(
+            geo_utils.make_rings(
+                self.points[self.indices[ring_vertices]],
+                indices=np.repeat(np.arange(np.count_nonzero(rings)), sizes[rings]),
+            )
+        )
+        return polygons
+
+
+def convex_hull_grouped(points: np.ndarray, group_ids: np.ndarray) -> GroupedHulls:
+    """
+    Convex hulls of many groups of points, say one per zone per hour, given an
+    (N, 2) array of points and the group id of every point.
+
+    Instead of a convex_hull_array call per group, the points are sorted once by
+    (group, x, y) and the monotone chain runs over all groups together, so the cost
+    hardly depends on how the points are split up.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    group_ids = np.asarray(group_ids)
+    assert points.ndim == 2 and points.shape[1] == 2, "Points must be an (N, 2) array."
+    assert len(group_ids) == len(points), "Every point needs a group id."
+
+    groups, inverse = np.unique(group_ids, return_inverse=True)
+    hull, hull_groups = _hulls(points, _sort_points(points, inverse), inverse)
+    offsets = np.searchsorted(hull_groups, np.arange(len(groups) + 1))
+    return GroupedHulls(points, groups, hull, offsets)
+
+
+class IncrementalHull:
+    """
+    Convex hull of a stream of points, say the area a vehicle has covered so far,
+    updated batch by batch without keeping the history: only the h hull vertices
+    are stored.
+
+    Each point of a batch is first tested against the current hull in O(log h): a
+    binary search on the angle around an interior point finds the edge it faces,
+    and one cross product tells which side of that edge it's on. Points inside are
+    dropped, which is the fate of almost every point once the hull has settled. Any
+    that are left are merged with the current vertices by the monotone chain.
+    """
+
+    def __init__(self, points: Optional[np.ndarray] = None) -> None:
+        self._vertices = np.empty((0, 2), dtype=np.float64)
+        # counter-clockwise copy of the vertices from the smallest angle around the
+        # centre, and those angles, for the containment test
+        self._centre = np.zeros(2)
+        self._wedges = self._vertices
+        self._angles = np.empty(0)
+        if points is not None:
+            self.add(points)
+
+    def __len__(self) -> int:
+        return len(self._vertices)
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """Hull vertices from the lowest point, clockwise (like convex_hull)."""
+        return self._vertices.copy()
+
+    @property
+    def polygon(self) -> "Polygon":
+        """The current hull, empty until there are three points not on one line."""
+        return geo_utils.Polygon(self._vertices if len(self._vertices) >= 3 else None)
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """Whether each of an (N, 2) array of points is strictly inside the hull."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self._vertices) < 3:
+            return np.zeros(len(points), dtype=bool)
+
+        offsets = points - self._centre
+        wedge = (
+            np.searchsorted(
+                self._angles, np.arctan2(offsets[:, 1], offsets[:, 0]), side="right"
+            )
+            - 1
+        ) % len(self._wedges)
+        return (
+            _cross(
+                self._wedges[wedge],
+                self._wedges[(wedge + 1) % len(self._wedges)],
+                points,
+            )
+            > 0
+        )
+
+    def add(self, points: np.ndarray) -> None:
+        """Grow the hull to take in an (N, 2) array of points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        points = points[~self.contains(points)]
+        if not len(points):
+            return
 
-    return Polygon(hull)
+        candidates = np.vstack([self._vertices, points])
+        self._vertices = candidates[_hull(candidates)]
+        if len(self._vertices) >= 3:
+            self._centre = self._vertices.mean(axis=0)
+            offsets = self._vertices[::-1] - self._centre
+            angles = np.arctan2(offsets[:, 1], offsets[:, 0])
+            start = np.argmin(angles)
+            self._wedges = np.roll(self._vertices[::-1], -start, axis=0)
+            self._angles = np.roll(angles, -start)
@@ -2,19 +2,60 @@
 shapely has a bunch of confusingly named functions
 this wrapper takes the convention that every function should be a verb,
 so appends "get_" or "make_" onto functions named as nouns
+
+shapely is imported lazily (PEP 562), so code that only uses the array-based paths
+of the library never pays for loading GEOS
 """
 
-from shapely import LineString  # noqa
-from shapely import Point  # noqa
-from shapely import Polygon  # noqa
-from shapely import contains  # noqa
-from shapely import from_geojson  # noqa
-from shapely import union  # noqa
-from shapely import bounds as make_bounds  # noqa
-from shapely import box as make_box  # noqa
-from shapely import difference as get_difference  # noqa
-from shapely import distance as get_distance  # noqa
-from shapely import intersection as get_intersection  # noqa
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from shapely import LineString  # noqa
+    from shapely import Point  # noqa
+    from shapely import Polygon  # noqa
+    from shapely import contains  # noqa
+    from shapely import from_geojson  # noqa
+    from shapely import simplify  # noqa
+    from shapely import union  # noqa
+    from shapely import bounds as make_bounds  # noqa
+    from shapely import box as make_box  # noqa
+    from shapely import linearrings as make_rings  # noqa
+    from shapely import polygons as make_polygons  # noqa
+    from shapely import difference as get_difference  # noqa
+    from shapely import distance as get_distance  # noqa
+    from shapely import intersection as get_intersection  # noqa
+
+# name in this module -> name in shapely; shapely (and GEOS with it) is only
+# imported the first time one of these is looked up
+_SHAPELY_NAMES = {
+    "LineString": "LineString",
+    "Point": "Point",
+    "Polygon": "Polygon",
+    "contains": "contains",
+    "from_geojson": "from_geojson",
+    "simplify": "simplify",
+    "union": "union",
+    "make_bounds": "bounds",
+    "make_box": "box",
+    "make_rings": "linearrings",
+    "make_polygons": "polygons",
+    "get_difference": "difference",
+    "get_distance": "distance",
+    "get_intersection": "intersection",
+}
 
 BoundsType = tuple[float, float, float, float]
 PointType = tuple[float, float]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SHAPELY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module("shapely"), _SHAPELY_NAMES[name])
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_SHAPELY_NAMES})
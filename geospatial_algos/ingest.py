@@ -0,0 +1,314 @@
+"""
+Stream GeoJSON FeatureCollections and newline-delimited GeoJSON (one feature per
+line) into an R-tree without loading the whole file.
+
+The file is read in chunks and decoded one feature at a time. Features are
+gathered into batches, and the bounds of a whole batch are computed at once: all
+of its positions go into one array and segmented min/max reductions give each
+feature's bounding box, whatever its geometry type.
+
+Functions:
+- iter_features - yield the features of a GeoJSON or NDJSON file one at a time
+- feature_bounds - labels and (N, 4) bounds of a batch of features
+- read_batches - yield batches of labels and bounds from a file
+- ingest - load a file into an existing index, or bulk load a new ArrayIndex,
+  suffixing repeated labels so every entry gets a unique one
+
+Resources:
+- https://datatracker.ietf.org/doc/html/rfc7946
+- https://stevage.github.io/ndgeojson/
+"""
+
+import json
+import time
+from itertools import chain
+from typing import Any, Iterator, NamedTuple, Optional, TextIO, Union
+
+import numpy as np
+
+from .rtree import ArrayIndex, Index
+
+FILE_FORMATS = ("auto", "geojson", "ndjson")
+CHUNK_SIZE = 2**20
+BATCH_SIZE = 10_000
+# fan-out of the index bulk loaded from a whole file
+MAX_CHILDREN = 16
+NDJSON_SUFFIXES = (".ndjson", ".geojsonl", ".geojsons", ".jsonl")
+# how many levels of arrays sit between a geometry's coordinates and its positions
+POSITION_DEPTHS = {
+    "Point": 0,
+    "MultiPoint": 1,
+    "LineString": 1,
+    "MultiLineString": 2,
+    "Polygon": 2,
+    "MultiPolygon": 3,
+}
+
+_decoder = json.JSONDecoder()
+
+
+class IngestStats(NamedTuple):
+    features: int
+    skipped: int
+    seconds: float
+
+    @property
+    def features_per_second(self) -> float:
+        return self.features / self.seconds if self.seconds else 0.0
+
+
+class _ChunkReader:
+    """Decode JSON values one at a time from a text file read in chunks."""
+
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        chunk = self.file.read(size or self.chunk_size)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """The next character that isn't whitespace ("" at the end of the file)."""
+        while True:
+            buffer = self.buffer
+            while self.position < len(buffer) and buffer[self.position] in " \t\n\r":
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position : self.position + 1]
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        assert (
+            character and character in characters
+        ), f"Invalid GeoJSON: expected one of {characters!r}, got {character!r}."
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        # every failed decode starts over, so double the read each time to decode a
+        # value much larger than chunk_size in linear rather than quadratic time
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # the value runs past the end of the buffer
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # a number could carry on in the next chunk
+            if end == len(self.buffer) and self._fill(size):
+                size *= 2
+                continue
+            self.position = end
+            return value
+
+
+def _iter_collection(reader: _ChunkReader) -> Iterator[dict]:
+    """Yield the features of a FeatureCollection (or a single Feature)."""
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    members = {}
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "features":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            # every other member is small: "type", "bbox", "crs", ...
+            members[key] = reader.value()
+        if reader.expect(",}") == "}":
+            break
+    if members.get("type") == "Feature":
+        yield members
+
+
+def iter_features(
+    path: str, file_format: str = "auto", chunk_size: int = CHUNK_SIZE
+) -> Iterator[dict]:
+    """
+    Features of a GeoJSON file (a FeatureCollection or a single Feature) or of a
+    newline-delimited file with one Feature per line. With file_format "auto", files
+    ending in .ndjson, .geojsonl, .geojsons or .jsonl are read as NDJSON.
+    """
+    assert file_format in FILE_FORMATS, f"Unknown file format {file_format}."
+    if file_format == "auto":
+        ndjson = path.lower().endswith(NDJSON_SUFFIXES)
+        file_format = "ndjson" if ndjson else "geojson"
+
+    with open(path, encoding="utf-8") as file:
+        if file_format == "ndjson":
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_collection(_ChunkReader(file, chunk_size))
+
+
+def _positions(geometry: Optional[dict]) -> list:
+    if not geometry:
+        return []
+    if geometry["type"] == "GeometryCollection":
+        return [
+            position
+            for member in geometry["geometries"]
+            for position in _positions(member)
+        ]
+    positions = geometry["coordinates"]
+    depth = POSITION_DEPTHS[geometry["type"]]
+    if depth == 0:
+        return [positions] if positions else []
+    for _ in range(depth - 1):
+        positions = chain.from_iterable(positions)
+    return list(positions)
+
+
+def feature_bounds(
+    features: list[dict], label_property: str = "name", first_id: int = 0
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Labels, (N, 4) minx, miny, maxx, maxy bounds, and a mask of the features that
+    have a non-empty geometry (the only ones the labels and bounds are given for).
+
+    A feature's label is its label_property, else its id, else its position in the
+    file (counting from first_id).
+    """
+    positions, counts = [], []
+    for feature in features:
+        feature_positions = _positions(feature.get("geometry"))
+        positions.extend(feature_positions)
+        counts.append(len(feature_positions))
+    counts = np.array(counts, dtype=np.int64)
+    present = counts > 0
+
+    labels = []
+    for idx in np.flatnonzero(present).tolist():
+        feature = features[idx]
+        label = (feature.get("properties") or {}).get(label_property)
+        if label is None:
+            label = feature.get("id", first_id + idx)
+        labels.append(str(label))
+    if not positions:
+        return labels, np.empty((0, 4)), present
+
+    try:
+        coords = np.array(positions, dtype=np.float64)[:, :2]
+    except ValueError:
+        # mixed 2D and 3D positions
+        coords = np.array([position[:2] for position in positions], dtype=np.float64)
+    offsets = np.r_[0, np.cumsum(counts[present])[:-1]]
+    bounds = np.hstack(
+        [
+            np.minimum.reduceat(coords, offsets, axis=0),
+            np.maximum.reduceat(coords, offsets, axis=0),
+        ]
+    )
+    return labels, bounds, present
+
+
+def read_batches(
+    path: str,
+    batch_size: int = BATCH_SIZE,
+    label_property: str = "name",
+    file_format: str = "auto",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[list[str], np.ndarray, int]]:
+    """
+    Yield (labels, bounds, skipped) for every batch_size features of a file, where
+    skipped counts the features of the batch without a geometry.
+    """
+    assert batch_size > 0, "batch_size must be positive."
+    batch: list[dict] = []
+    first_id = 0
+    for feature in iter_features(path, file_format, chunk_size):
+        batch.append(feature)
+        if len(batch) == batch_size:
+            labels, bounds, _ = feature_bounds(batch, label_property, first_id)
+            yield labels, bounds, len(batch) - len(labels)
+            first_id += len(batch)
+            batch = []
+    if batch:
+        labels, bounds, _ = feature_bounds(batch, label_property, first_id)
+        yield labels, bounds, len(batch) - len(labels)
+
+
+def _unique_labels(
+    labels: list[str], taken: set[str], suffixes: dict[str, int]
+) -> list[str]:
+    """
+    Labels with " (2)", " (3)", ... added to those already taken, which the new
+    labels are added to. suffixes remembers the last suffix used for each label.
+    """
+    unique = []
+    for label in labels:
+        candidate = label
+        while candidate in taken:
+            suffixes[label] = suffixes.get(label, 1) + 1
+            candidate = f"{label} ({suffixes[label]})"
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def ingest(
+    path: str,
+    index: Optional[Union[Index, ArrayIndex]] = None,
+    batch_size: int = BATCH_SIZE,
+    label_property: str = "name",
+    file_format: str = "auto",
+    max_children: int = MAX_CHILDREN,
+) -> tuple[Union[Index, ArrayIndex], IngestStats]:
+    """
+    Load every feature of a GeoJSON or NDJSON file into an R-tree, returning it
+    with the number of features loaded and skipped (no geometry) and the time it
+    took.
+
+    Batches are inserted one entry at a time into the given index. Without one,
+    only the labels and bounds are kept (a few dozen bytes per feature, rather than
+    the parsed features) and a new ArrayIndex with max_children children per node
+    is bulk loaded from them at the end.
+
+    Names are often repeated in real files, so a label that is already in the index
+    or was used earlier in the file gets a " (2)", " (3)", ... suffix.
+    """
+    start = time.perf_counter()
+    loaded = skipped = 0
+    taken = set() if index is None else set(index.labels)
+    suffixes: dict[str, int] = {}
+    all_labels: list[str] = []
+    all_bounds: list[np.ndarray] = []
+    for labels, bounds, batch_skipped in read_batches(
+        path, batch_size, label_property, file_format
+    ):
+        labels = _unique_labels(labels, taken, suffixes)
+        loaded += len(labels)
+        skipped += batch_skipped
+        if index is None:
+            all_labels.extend(labels)
+            all_bounds.append(bounds)
+        else:
+            for label, entry_bounds in zip(labels, bounds.tolist()):
+                index.insert(label, entry_bounds)
+
+    if index is None:
+        index = ArrayIndex.bulk_load(
+            all_labels,
+            np.concatenate(all_bounds) if all_bounds else np.empty((0, 4)),
+            max_children,
+        )
+    return index, IngestStats(loaded, skipped, time.perf_counter() - start)
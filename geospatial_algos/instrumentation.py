@@ -0,0 +1,148 @@
+"""
+Opt-in instrumentation of the library's hot paths. While it is disabled (the
+default), an instrumented call only pays for checking the enabled flag. Once
+enabled, every instrumented call records its duration and a few counters under
+its operation name:
+
+- rtree.Index.search / rtree.ArrayIndex.search_ids - nodes visited, children
+  tested against the query, results
+- rtree.Index.insert / rtree.ArrayIndex.insert - node splits, root growth
+- line_simplification.douglas_peucker - lines, points, depth (rounds of splits,
+  the recursion depth of a recursive implementation), distance evaluations
+- convex_hull.convex_hull / convex_hull.convex_hull_array - points sorted, points
+  popped off the hull (or discarded as not being corners), hull vertices
+
+Records are aggregated into a Stats object, and passed to any registered hooks as
+they happen, e.g. to export them to a metrics stack.
+
+Functions:
+- enable / disable - switch recording on or off
+- collect - record into a fresh Stats for the duration of a with block
+- get_stats - the Stats being recorded into
+- add_hook / remove_hook - call a function with every record
+- record - report one call of an operation (used by the instrumented code)
+
+Classes:
+- OperationStats - calls, timings and summed counters of one operation
+- Stats - OperationStats by operation name
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# read by the instrumented code before doing any work for instrumentation
+enabled = False
+
+Hook = Callable[[str, float, dict[str, int]], None]
+
+
+class OperationStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.counters: defaultdict[str, int] = defaultdict(int)
+
+    def __repr__(self) -> str:
+        return (
+            f"OperationStats(calls={self.calls}, total_seconds={self.total_seconds}, "
+            f"max_seconds={self.max_seconds}, counters={dict(self.counters)})"
+        )
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.mean_seconds,
+            "max_seconds": self.max_seconds,
+            "counters": dict(self.counters),
+        }
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.operations: defaultdict[str, OperationStats] = defaultdict(OperationStats)
+
+    def __getitem__(self, operation: str) -> OperationStats:
+        return self.operations[operation]
+
+    def __contains__(self, operation: str) -> bool:
+        return operation in self.operations
+
+    def add(self, operation: str, seconds: float, counters: dict[str, int]) -> None:
+        stats = self.operations[operation]
+        stats.calls += 1
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        for name, value in counters.items():
+            stats.counters[name] += value
+
+    def as_dict(self) -> dict[str, dict]:
+        return {
+            operation: stats.as_dict()
+            for operation, stats in sorted(self.operations.items())
+        }
+
+    def reset(self) -> None:
+        self.operations.clear()
+
+
+_stats = Stats()
+_hooks: list[Hook] = []
+
+
+def enable() -> None:
+    global enabled
+    enabled = True
+
+
+def disable() -> None:
+    global enabled
+    enabled = False
+
+
+def get_stats() -> Stats:
+    return _stats
+
+
+def add_hook(hook: Hook) -> None:
+    """Call hook(operation, seconds, counters) for every recorded call."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    _hooks.remove(hook)
+
+
+def record(operation: str, seconds: float, **counters: int) -> None:
+    _stats.add(operation, seconds, counters)
+    for hook in _hooks:
+        hook(operation, seconds, counters)
+
+
+@contextmanager
+def collect(hook: Optional[Hook] = None) -> Iterator[Stats]:
+    """
+    Enable recording for the duration of a with block, into a fresh Stats that is
+    yielded, and with hook (if given) registered. The previous state is restored
+    afterwards.
+    """
+    global _stats
+    previous_stats, previous_enabled = _stats, enabled
+    _stats = Stats()
+    if hook is not None:
+        add_hook(hook)
+    enable()
+    try:
+        yield _stats
+    finally:
+        if hook is not None:
+            remove_hook(hook)
+        _stats = previous_stats
+        if not previous_enabled:
+            disable()
@@ -4,38 +4,488 @@ The Douglas–Peucker, or iterative end-point fit, algorithm smooths polylines
 The simplified curve preserves the rough shape of the original curve by preserving
 the subset of points that exceed a coarsening threshold parameter called epsilon.
 
+The Visvalingam–Whyatt algorithm instead repeatedly drops the point that forms the
+smallest triangle with its neighbours, so it removes detail by area rather than by
+distance, which tends to look more natural on maps.
+
+Functions:
+- simplify - simplify a LineString
+- simplify_mask - which points of an (N, 2) coordinate array survive simplification
+- simplify_thresholds - the largest epsilon at which each point of a line survives,
+  so any epsilon can be applied later with one comparison
+- simplify_many - simplify every line of a ragged coordinate array in one go
+- simplify_stream - simplify an endless stream of points as they arrive
+- visvalingam_importance - the area at which each point of a line would be dropped,
+  so any tolerance can be applied later with one comparison
+- simplify_vw - simplify a LineString with Visvalingam–Whyatt, optionally keeping
+  it from crossing itself
+
+Classes:
+- SimplificationCache - LRU cache of Douglas–Peucker thresholds, so simplifying a
+  line it has seen before at any epsilon is a filter
+
 Resources:
 - https://cartography-playground.gitlab.io/playgrounds/douglas-peucker-algorithm/
 - https://medium.com/@indemfeld/the-ramer-douglas-peucker-algorithm-d542807093e7
+- https://bost.ocks.org/mike/simplify/
+- Visvalingam & Whyatt, Line Generalisation by Repeated Elimination of Points (1993)
 """
 
-from .geo_utils import LineString, Point, PointType, get_distance
+import hashlib
+import heapq
+import multiprocessing
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Hashable, Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from . import geo_utils, instrumentation
+from .geo_utils import PointType
+
+if TYPE_CHECKING:
+    from .geo_utils import LineString
+
+# split the lines into this many tasks per worker, so slow tasks even out
+TASKS_PER_WORKER = 4
+# most points simplify_stream holds on to before it has to emit a vertex
+STREAM_BUFFER_SIZE = 1_000
+# how much SimplificationCache holds on to by default (coordinates and thresholds)
+CACHE_MAX_BYTES = 64 * 2**20
+# size of the digest that keys lines by their coordinates
+CACHE_DIGEST_BYTES = 16
+
+
+def _segment_distances(
+    points: np.ndarray, starts: np.ndarray, ends: np.ndarray, sizes: np.ndarray
+) -> np.ndarray:
+    """
+    Distance from each point to the segment between the start and end of its range
+    (the first sizes[0] points belong to the first range, and so on): perpendicular
+    where the point projects onto the segment, else to the nearer end point.
+    Computed the same way as GEOS, so exact ties break the same way.
+    """
+    dx, dy = ends[:, 0] - starts[:, 0], ends[:, 1] - starts[:, 1]
+    length_squared = dx * dx + dy * dy
+    lengths = np.repeat(np.sqrt(length_squared), sizes)
+    x_offsets = points[:, 0] - np.repeat(starts[:, 0], sizes)
+    y_offsets = points[:, 1] - np.repeat(starts[:, 1], sizes)
+    dx, dy = np.repeat(dx, sizes), np.repeat(dy, sizes)
+    length_squared = np.repeat(length_squared, sizes)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        along = x_offsets * dx
+        along += y_offsets * dy
+        along /= length_squared
+        distances = y_offsets * dx
+        distances -= x_offsets * dy
+        np.abs(distances, out=distances)
+        distances /= length_squared
+    distances *= lengths
+
+    before = along <= 0
+    before |= length_squared == 0
+    x_before, y_before = x_offsets[before], y_offsets[before]
+    distances[before] = np.sqrt(x_before * x_before + y_before * y_before)
+    beyond = along >= 1
+    x_beyond = points[beyond, 0] - np.repeat(ends[:, 0], sizes)[beyond]
+    y_beyond = points[beyond, 1] - np.repeat(ends[:, 1], sizes)[beyond]
+    distances[beyond] = np.sqrt(x_beyond * x_beyond + y_beyond * y_beyond)
+    return distances
+
+
+def _douglas_peucker(
+    coords: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    epsilon: float = -np.inf,
+) -> np.ndarray:
+    """
+    Douglas–Peucker on every range from starts[i] to ends[i] (inclusive), returning
+    the threshold of every point of coords: the largest epsilon it survives
+    simplification at (inf for the range ends). Splitting stops at ranges whose
+    farthest point is within epsilon, and the points they leave get -inf, so the
+    points to keep at epsilon are always thresholds > epsilon.
+
+    Instead of recursing, the ranges still to split are kept in a work list and
+    handled all at once: one pass computes the distances of every interior point of
+    every range, segmented reductions find each range's farthest point (the first
+    one on ties), and the ranges split at a point more than epsilon away make up
+    the next work list. A split point's threshold is the smaller of its distance
+    and the threshold of the split that made its range.
+    """
+    start = time.perf_counter() if instrumentation.enabled else 0.0
+    thresholds = np.full(len(coords), -np.inf)
+    thresholds[starts] = thresholds[ends] = np.inf
+    starts, ends = np.asarray(starts), np.asarray(ends)
+    lines, depth, distance_evaluations = len(starts), 0, 0
+    bounds = np.full(len(starts), np.inf)
+    while True:
+        splittable = ends - starts >= 2
+        starts, ends, bounds = starts[splittable], ends[splittable], bounds[splittable]
+        if not len(starts):
+            if instrumentation.enabled:
+                instrumentation.record(
+                    "line_simplification.douglas_peucker",
+                    time.perf_counter() - start,
+                    lines=lines,
+                    points=len(coords),
+                    depth=depth,
+                    distance_evaluations=distance_evaluations,
+                )
+            return thresholds
+
+        sizes = ends - starts - 1
+        offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+        depth += 1
+        distance_evaluations += int(offsets[-1] + sizes[-1])
+        interior = np.arange(offsets[-1] + sizes[-1])
+        interior += np.repeat(starts + 1 - offsets, sizes)
+        distances = _segment_distances(
+            coords[interior], coords[starts], coords[ends], sizes
+        )
+        farthest = np.maximum.reduceat(distances, offsets)
+        first = np.where(distances == np.repeat(farthest, sizes), interior, len(coords))
+        splits = np.minimum.reduceat(first, offsets)
 
+        split = farthest > epsilon
+        splits, bounds = splits[split], np.minimum(farthest[split], bounds[split])
+        thresholds[splits] = bounds
+        starts, ends = np.r_[starts[split], splits], np.r_[splits, ends[split]]
+        bounds = np.r_[bounds, bounds]
 
-def _simplify(line_coords: list[PointType], epsilon: float = 0.0) -> list[PointType]:
-    if len(line_coords) <= 2:
-        return line_coords
 
-    first, last = line_coords[0], line_coords[-1]
-    baseline = LineString([first, last])
+def simplify_thresholds(coords: np.ndarray) -> np.ndarray:
+    """
+    The largest epsilon at which each point of an (N, 2) coordinate array survives
+    Douglas–Peucker (inf for the end points), from a single run that splits every
+    range down to single segments. simplify_mask(coords, epsilon) is then
+    simplify_thresholds(coords) > epsilon for any epsilon.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if not len(coords):
+        return np.zeros(0)
+    return _douglas_peucker(coords, np.array([0]), np.array([len(coords) - 1]))
 
-    notable_point_idx = next(
+
+def simplify_mask(coords: np.ndarray, epsilon: float = 0.0) -> np.ndarray:
+    """
+    Douglas–Peucker over an (N, 2) array of coordinates, returning a mask of the
+    points to keep.
+
+    Each range between two kept points is split at the point farthest from the
+    segment joining them, as long as that point is more than epsilon away. There is
+    no recursion, so long traces can't hit the recursion limit, and distances are
+    computed for whole ranges at once.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if not len(coords):
+        return np.zeros(0, dtype=bool)
+    thresholds = _douglas_peucker(
+        coords, np.array([0]), np.array([len(coords) - 1]), epsilon
+    )
+    return thresholds > epsilon
+
+
+def simplify(polyline: "LineString", epsilon: float = 0.0) -> "LineString":
+    coords = np.asarray(polyline.coords)
+    return geo_utils.LineString(coords[simplify_mask(coords, epsilon)])
+
+
+def _simplify_lines(
+    coords: np.ndarray, offsets: np.ndarray, epsilon: float
+) -> tuple[np.ndarray, np.ndarray]:
+    lines = np.flatnonzero(np.diff(offsets) > 0)
+    thresholds = _douglas_peucker(
+        coords, offsets[lines], offsets[lines + 1] - 1, epsilon
+    )
+    keep = thresholds > epsilon
+    kept_before = np.r_[0, np.cumsum(keep)]
+    return coords[keep], kept_before[offsets]
+
+
+def simplify_many(
+    coords: np.ndarray,
+    offsets: np.ndarray,
+    epsilon: float = 0.0,
+    workers: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simplify many polylines given as ragged arrays: the (N, 2) coordinates of all
+    lines back to back, and offsets such that line i is
+    coords[offsets[i] : offsets[i + 1]].
+
+    Every line goes through the same Douglas–Peucker work list as simplify_mask, so
+    all of them are simplified together in a handful of NumPy passes. With workers,
+    the lines are split into chunks that are simplified across a process pool.
+
+    Returns the simplified lines in the same ragged form.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    assert offsets[0] == 0 and offsets[-1] == len(coords), "Offsets must span coords."
+    # a pool only pays off with several lines to share out
+    if not workers or workers == 1 or len(offsets) <= 2:
+        return _simplify_lines(coords, offsets, epsilon)
+
+    line_bounds = np.unique(
+        np.linspace(0, len(offsets) - 1, workers * TASKS_PER_WORKER + 1).astype(int)
+    )
+    tasks = [
         (
-            idx
-            for idx, coord in enumerate(line_coords)
-            if get_distance(baseline, Point(coord)) > epsilon
+            coords[offsets[first] : offsets[last]],
+            offsets[first : last + 1] - offsets[first],
+            epsilon,
+        )
+        for first, last in zip(line_bounds[:-1], line_bounds[1:])
+    ]
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.starmap(_simplify_lines, tasks)
+
+    kept_before = np.cumsum([0] + [len(task_coords) for task_coords, _ in results])
+    return (
+        np.concatenate([task_coords for task_coords, _ in results]),
+        np.concatenate(
+            [
+                task_offsets[:-1] + start
+                for (_, task_offsets), start in zip(results, kept_before)
+            ]
+            + [kept_before[-1:]]
         ),
-        None,
     )
-    if notable_point_idx:
-        left = _simplify([first, line_coords[notable_point_idx]], epsilon)
-        right = _simplify(line_coords[notable_point_idx:], epsilon)
-        return left + right[1:]
 
-    else:
-        return [first, last]
 
+def _exceeds(window: np.ndarray, point: PointType, epsilon: float) -> bool:
+    # whether any point after the first in the window is more than epsilon from the
+    # segment between the first one and the new point
+    offsets = window[1:] - window[0]
+    direction = np.subtract(point[:2], window[0])
+    length_squared = direction @ direction
+    if length_squared > 0:
+        along = np.clip(offsets @ direction / length_squared, 0, 1)
+        offsets -= along[:, None] * direction
+    return bool(np.einsum("ij,ij->i", offsets, offsets).max() > epsilon * epsilon)
+
+
+def simplify_stream(
+    points: Iterable[PointType],
+    epsilon: float = 0.0,
+    max_buffer: int = STREAM_BUFFER_SIZE,
+) -> Iterator[PointType]:
+    """
+    Simplify a stream of points, say a device's GPS feed, yielding the vertices to
+    keep as the points arrive rather than once the trace is complete.
+
+    Opening window: starting from the last vertex, the window grows one point at a
+    time for as long as every point in it stays within epsilon of the segment from
+    that vertex to the newest point. When a point breaks that, the point before it
+    becomes the next vertex. So, as with simplify, no dropped point is more than
+    epsilon from the simplified line, though the vertices kept can differ.
+
+    At most max_buffer points are held at any time: a vertex is emitted once the
+    window is full, which bounds both memory and how far output lags behind input.
+    """
+    assert max_buffer >= 2, "The window needs room for at least two points."
+    window = np.empty((max_buffer, 2), dtype=np.float64)
+    size = 0
+    for point in points:
+        if size >= 2 and (
+            size == max_buffer or _exceeds(window[:size], point, epsilon)
+        ):
+            x, y = window[size - 1].tolist()
+            yield x, y
+            window[0] = x, y
+            size = 1
+        elif not size:
+            x, y = float(point[0]), float(point[1])
+            yield x, y
+
+        window[size] = point[:2]
+        size += 1
+
+    if size >= 2:
+        x, y = window[size - 1].tolist()
+        yield x, y
+
+
+def visvalingam_importance(coords: np.ndarray) -> np.ndarray:
+    """
+    Effective area of every point of an (N, 2) coordinate array under
+    Visvalingam–Whyatt: the size of the triangle it forms with its neighbours at the
+    moment it would be eliminated. End points get inf.
+
+    Points are eliminated smallest triangle first from a heap, and each elimination
+    updates the triangles of the two neighbours, so the whole pass is O(n log n).
+    An area is never smaller than one eliminated before it, so simplifying with a
+    tolerance comes down to coords[importance > tolerance], and one pass serves
+    every zoom level.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    size = len(coords)
+    importance = [np.inf] * size
+    if size < 3:
+        return np.array(importance)
+
+    xs, ys = coords[:, 0].tolist(), coords[:, 1].tolist()
+    previous, following = list(range(-1, size - 1)), list(range(1, size + 1))
+    # current area of every point still in the line (-1 once it's gone, and for the
+    # end points). The heap holds a lower bound on the area of every point: a smaller
+    # area is pushed straight away, while a larger one is only pushed once the stale
+    # entry comes out of the heap, which saves most of the pushes.
+    before_xy, after_xy = coords[:-2] - coords[1:-1], coords[2:] - coords[1:-1]
+    crosses = before_xy[:, 0] * after_xy[:, 1] - after_xy[:, 0] * before_xy[:, 1]
+    areas = [-1.0, *(0.5 * np.abs(crosses)).tolist(), -1.0]
+    heap = list(zip(areas[1:-1], range(1, size - 1)))
+    heapq.heapify(heap)
+    largest = 0.0
+    while heap:
+        point_area, point = heapq.heappop(heap)
+        current_area = areas[point]
+        if current_area != point_area:
+            if current_area > point_area:
+                heapq.heappush(heap, (current_area, point))
+            continue
+        if point_area > largest:
+            largest = point_area
+        importance[point] = largest
+        areas[point] = -1.0
+
+        before, after = previous[point], following[point]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if areas[neighbour] >= 0:
+                x, y = xs[neighbour], ys[neighbour]
+                before_x = xs[previous[neighbour]] - x
+                before_y = ys[previous[neighbour]] - y
+                after_x, after_y = (
+                    xs[following[neighbour]] - x,
+                    ys[following[neighbour]] - y,
+                )
+                neighbour_area = 0.5 * abs(before_x * after_y - after_x * before_y)
+                if neighbour_area < areas[neighbour]:
+                    heapq.heappush(heap, (neighbour_area, neighbour))
+                areas[neighbour] = neighbour_area
+    return np.array(importance)
+
+
+def simplify_vw(
+    polyline: "LineString", tolerance: float = 0.0, preserve_topology: bool = False
+) -> "LineString":
+    """
+    Visvalingam–Whyatt simplification: keep the points whose effective area is
+    larger than tolerance (in squared units of the coordinates).
+
+    With preserve_topology, a line that didn't cross itself won't start to: the
+    tolerance is lowered, by bisecting over the effective areas below it, until
+    the simplified line is simple again.
+    """
+    coords = np.asarray(polyline.coords)
+    importance = visvalingam_importance(coords)
+    simplified = geo_utils.LineString(coords[importance > tolerance])
+    if not preserve_topology or simplified.is_simple or not polyline.is_simple:
+        return simplified
+
+    # the line with every point kept is simple, so look for the largest tolerance
+    # below the requested one whose line still is
+    tolerances = np.unique(importance[importance <= tolerance])
+    low, high = -1, len(tolerances) - 1
+    while high - low > 1:
+        middle = (low + high) // 2
+        candidate = geo_utils.LineString(coords[importance > tolerances[middle]])
+        if candidate.is_simple:
+            low, simplified = middle, candidate
+        else:
+            high = middle
+    return simplified if low >= 0 else polyline
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class SimplificationCache:
+    """
+    Douglas–Peucker for geometries that get simplified over and over at a handful
+    of epsilons (e.g. the same roads for every zoom level of a tile server).
+
+    The first time a line is seen, simplify_thresholds runs once and its result is
+    kept; every later request for that line, at any epsilon, is a threshold filter.
+    Lines are keyed by a digest of their coordinates, confirmed against the stored
+    copy on a hit, or by the key passed in if the caller already has an id for them.
+    The least recently used lines are dropped once the coordinates, thresholds and
+    digests held add up to more than max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        assert max_bytes >= 0, "max_bytes can't be negative."
+        self.max_bytes = max_bytes
+        # key -> coordinates, thresholds and the bytes they take up
+        self._entries: OrderedDict[Hashable, tuple[np.ndarray, np.ndarray, int]] = (
+            OrderedDict()
+        )
+        self._size_bytes = 0
+        self._hits = self._misses = 0
+
+    def thresholds(
+        self, coords: np.ndarray, key: Optional[Hashable] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The coordinates of a line and the threshold of each of its points."""
+        coords = np.asarray(coords, dtype=np.float64)
+        key_bytes = 0
+        if key is None:
+            digest = hashlib.blake2b(coords.tobytes(), digest_size=CACHE_DIGEST_BYTES)
+            digest.update(str(coords.shape).encode())
+            key, key_bytes = digest.digest(), CACHE_DIGEST_BYTES
+        entry = self._entries.get(key)
+        if entry is not None and (key_bytes == 0 or np.array_equal(entry[0], coords)):
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+        self._misses += 1
+        thresholds = simplify_thresholds(coords)
+        entry_bytes = coords.nbytes + thresholds.nbytes + key_bytes
+        if entry_bytes <= self.max_bytes:
+            if key in self._entries:
+                self._size_bytes -= self._entries.pop(key)[2]
+            self._entries[key] = (coords.copy(), thresholds, entry_bytes)
+            self._size_bytes += entry_bytes
+            while self._size_bytes > self.max_bytes:
+                _, (_, _, old_bytes) = self._entries.popitem(last=False)
+                self._size_bytes -= old_bytes
+        return coords, thresholds
+
+    def simplify_mask(
+        self, coords: np.ndarray, epsilon: float = 0.0, key: Optional[Hashable] = None
+    ) -> np.ndarray:
+        return self.thresholds(coords, key)[1] > epsilon
+
+    def simplify(
+        self,
+        polyline: "LineString",
+        epsilon: float = 0.0,
+        key: Optional[Hashable] = None,
+    ) -> "LineString":
+        coords, thresholds = self.thresholds(np.asarray(polyline.coords), key)
+        return geo_utils.LineString(coords[thresholds > epsilon])
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            self._hits,
+            self._misses,
+            len(self._entries),
+            self._size_bytes,
+            self.max_bytes,
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size_bytes = 0
+        self._hits = self._misses = 0
 
-def simplify(polyline: LineString, epsilon: float = 0.0) -> LineString:
-    simplified_points = _simplify(polyline.coords, epsilon)
-    return LineString(simplified_points)
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -5,83 +5,305 @@ whereas a branching node corresponds to the minimum bounding box that contains a
 Functions:
 - insert - accept a label and a bounding box to add to the index
 - search - accept a bounding box to check for intersections in the index
+- bulk_load - build a balanced, fully packed tree from many bounding boxes at once
+  using Sort-Tile-Recursive (STR) packing, or by cutting their Hilbert order into
+  runs
+- nearest - lazily yield the entries closest to a point, nearest first
+- delete / update - remove an entry or move it to new bounds, keeping the tree tight
+- spatial_join - stream the pairs of entries from two indexes whose bboxes match
+- save / open - write an index to a flat binary file and serve queries straight
+  from a read-only ArrayIndex memory map of it
+
+Classes:
+- Index - tree of Node objects, each holding its bounds and a shapely bbox built on
+  first use
+- ArrayIndex - same insert/search API, but node and entry bounds live in contiguous
+  float64 NumPy arrays and are compared with plain arithmetic instead of GEOS calls
+- ParallelIndex - answers query batches across a process pool whose workers all
+  read the same shared-memory copy of the tree
 
 Resources:
 - https://towardsdatascience.com/speed-up-your-geospatial-data-analysis-with-r-trees-4f75abdc6025
+- Leutenegger, Lopez & Edgington, STR: A Simple and Efficient Algorithm for R-Tree
+  Packing (1997)
+- Kamel & Faloutsos, On Packing R-trees (1993)
 """
 
-from itertools import combinations
-from typing import Optional
+import heapq
+import math
+import multiprocessing
+import os
+import struct
+import time
+from collections.abc import Mapping
+from itertools import count
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+import numpy as np
 
-import geojson
+from . import geo_utils, instrumentation, space_filling
+from .geo_utils import BoundsType, PointType
 
-from .geo_utils import (
-    BoundsType,
-    Polygon,
-    contains,
-    get_difference,
-    get_distance,
-    get_intersection,
-    make_bounds,
-    make_box,
-    union,
-)
+if TYPE_CHECKING:
+    from .geo_utils import Polygon
 
 MAX_CHILDREN = 2
+INITIAL_CAPACITY = 64
 
 
 class Node:
+    """
+    Leaf nodes carry the label of an entry, branch nodes carry children and no
+    label. Only the raw bounds are stored: the shapely bbox is built the first time
+    it is asked for, and __slots__ saves a __dict__ per node.
+    """
+
+    __slots__ = ("bounds", "label", "children", "_bbox")
+
     def __init__(self, bounds: BoundsType, label: Optional[str] = None) -> None:
-        self.bbox = make_box(*bounds)
+        self.bounds: BoundsType = tuple(bounds)  # type: ignore
         self.label = label
         self.children: list["Node"] = []
+        self._bbox: Optional["Polygon"] = None
 
     def __repr__(self) -> str:
         description = type(self).__name__
         if self.label:
             description = f"{description} '{self.label}'"
 
+        import geojson
+
         # put geojson on newline to easily copy/paste while debugging
         return f"{description}:\n{geojson.dumps(self.bbox)}"
 
+    @property
+    def bbox(self) -> "Polygon":
+        if self._bbox is None:
+            self._bbox = geo_utils.make_box(*self.bounds)
+        return self._bbox
+
     def add_child(self, child: "Node") -> None:
         self.children.append(child)
 
     def update_bounds(self, bounds: BoundsType) -> None:
-        self.bbox = make_box(*bounds)
+        self.bounds = tuple(bounds)  # type: ignore
+        self._bbox = None
 
     def reset_children(self) -> None:
         self.children = []
 
 
 class Index:
-    def __init__(self) -> None:
+    """
+    Tree of Node objects. Nodes hold up to max_children children, and a full node
+    is split on its children's raw bounds by Guttman's "linear" or "quadratic"
+    algorithm, as in ArrayIndex, keeping at least min_children in each half.
+
+    R* is not supported: entries go under the smallest node that contains them
+    rather than through an overlap-minimizing choice of subtree, and there is no
+    forced reinsertion. Use ArrayIndex(split="rstar") for it.
+
+    Batches of queries (search_many) and save use an ArrayIndex packed from the
+    tree on first use after a change.
+
+    labels maps every label to its Node. A deleted entry that other entries were
+    nested under stays in the tree as an unlabelled branch node.
+    """
+
+    def __init__(
+        self,
+        max_children: int = MAX_CHILDREN,
+        min_children: Optional[int] = None,
+        split: str = "quadratic",
+    ) -> None:
+        if min_children is None:
+            min_children = _default_min_children(max_children)
+        assert max_children >= 2, "Nodes need room for at least two children."
+        assert (
+            1 <= min_children <= max_children // 2
+        ), "min_children must be between 1 and half of max_children."
+        assert split in INDEX_SPLITS, (
+            f"Unknown split {split} for Index, must be one of {list(INDEX_SPLITS)} "
+            "(R* needs ArrayIndex)."
+        )
         self.root: Optional[Node] = None
-        self.labels: set[str] = set()
+        self.labels: dict[str, Node] = {}
+        self.max_children = max_children
+        self.min_children = min_children
+        self.split = split
+        self.nodes_visited = 0
+        self._packed: Optional["ArrayIndex"] = None
+
+    @classmethod
+    def bulk_load(
+        cls,
+        labels: list[str],
+        bounds: np.ndarray,
+        max_children: int = MAX_CHILDREN,
+        min_children: Optional[int] = None,
+        split: str = "quadratic",
+        packing: str = "str",
+    ) -> "Index":
+        """
+        Build a fully packed tree, grouping the boxes into nodes with "str" or
+        "hilbert" packing. min_children and split only matter for entries inserted
+        afterwards.
+        """
+        index = cls(max_children, min_children, split)
+        bounds = _check_bulk_input(labels, bounds)
+        assert (
+            packing in PACKINGS
+        ), f"Unknown packing {packing}, must be one of {list(PACKINGS)}."
+        if not len(labels):
+            return index
+        nodes = [
+            Node(entry_bounds, label=label)
+            for label, entry_bounds in zip(labels, bounds.tolist())
+        ]
+        index.labels = {node.label: node for node in nodes}  # type: ignore
+        level_bounds = bounds
+        while True:
+            order, sizes = PACKINGS[packing](level_bounds, index.max_children)
+            parents, parent_bounds = [], []
+            for group in np.split(order, np.cumsum(sizes)[:-1]):
+                group_bounds = _total_bounds(level_bounds[group])
+                parent = Node(group_bounds.tolist())
+                for idx in group:
+                    parent.add_child(nodes[idx])
+                parents.append(parent)
+                parent_bounds.append(group_bounds)
+
+            if len(parents) == 1:
+                index.root = parents[0]
+                return index
+
+            nodes, level_bounds = parents, np.array(parent_bounds)
 
     def search(self, bounds: BoundsType) -> list[Node]:
-        bbox = make_box(*bounds)
-        parent = self.find_parent_node(bbox)
-        if parent is None:
-            return []
+        """
+        Descend into every child whose bbox intersects the query and skip the rest,
+        so the cost grows with the tree height and the number of hits rather than
+        with the size of the dataset. Every intersecting entry (labelled node) is
+        returned, including entries that later inserts were nested under. Sets
+        nodes_visited to the number of nodes whose children were tested.
+        """
+        start = time.perf_counter() if instrumentation.enabled else 0.0
+        self.nodes_visited = children_tested = 0
+        leaf_nodes = []
+        if self.root is not None and _bounds_intersect(self.root.bounds, bounds):
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                self.nodes_visited += 1
+                children_tested += len(node.children)
+                # compare raw bounds, GEOS predicates are unreliable for the zero-area
+                # boxes that represent points
+                for child in node.children:
+                    if not _bounds_intersect(child.bounds, bounds):
+                        continue
+                    if child.label is not None:
+                        leaf_nodes.append(child)
+                    if child.children:
+                        stack.append(child)
 
-        leaf_nodes = self.get_leaf_nodes(parent)
-        return self.filter_intersecting(leaf_nodes, bbox)
+        if instrumentation.enabled:
+            instrumentation.record(
+                "rtree.Index.search",
+                time.perf_counter() - start,
+                nodes_visited=self.nodes_visited,
+                children_tested=children_tested,
+                results=len(leaf_nodes),
+            )
+        return leaf_nodes
+
+    def nearest(
+        self,
+        point: PointType,
+        k: Optional[int] = 1,
+        max_distance: Optional[float] = None,
+    ) -> Iterator[tuple[str, float]]:
+        """
+        Same as ArrayIndex.nearest. A labelled node is queued once as an entry and,
+        if later inserts were nested under it, once more to open its children.
+        """
+        if self.root is None:
+            return
+
+        target = np.asarray(point, dtype=np.float64)
+        tiebreak = count()
+        # (distance, tiebreak, is_entry, node)
+        queue = [
+            (
+                float(_min_distance(np.array(self.root.bounds), target)),
+                0,
+                False,
+                self.root,
+            )
+        ]
+        found = 0
+        while queue and (k is None or found < k):
+            distance, _, is_entry, node = heapq.heappop(queue)
+            if max_distance is not None and distance > max_distance:
+                return
+            if is_entry:
+                yield node.label, distance  # type: ignore
+                found += 1
+                continue
 
-    def find_parent_node(self, bbox: Polygon) -> Optional[Node]:
+            child_bounds = np.array([child.bounds for child in node.children])
+            distances = _min_distance(child_bounds, target)
+            for child, child_distance in zip(node.children, distances.tolist()):
+                if max_distance is not None and child_distance > max_distance:
+                    continue
+                if child.label is not None:
+                    heapq.heappush(queue, (child_distance, next(tiebreak), True, child))
+                if child.children:
+                    heapq.heappush(
+                        queue, (child_distance, next(tiebreak), False, child)
+                    )
+
+    def _packed_index(self) -> "ArrayIndex":
+        if self._packed is None:
+            self._packed = _as_array_index(self)
+        return self._packed
+
+    def search_many(self, bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Same as ArrayIndex.search_many. The entry offsets point into the packed copy
+        of the tree, so pass them to get_labels before inserting again.
+        """
+        return self._packed_index().search_many(bounds)
+
+    def get_labels(self, entries: np.ndarray) -> list[str]:
+        return self._packed_index().get_labels(entries)
+
+    def save(self, path: str) -> None:
+        """
+        Write the packed copy of the tree in the ArrayIndex.save format. Read it back
+        with ArrayIndex.open, which serves the same queries from a memory map.
+        """
+        self._packed_index().save(path)
+
+    def find_parent_node(self, bbox: "Polygon") -> Optional[Node]:
         # no data in the index
         if self.root is None:
             return None
 
         # the outermost outer bounds of the dataset don't contain the query bbox
-        if not contains(self.root.bbox, bbox):
+        if not geo_utils.contains(self.root.bbox, bbox):
             return None
 
         # traverse children to find the smallest bbox that contains the query bbox
         parent = self.root
         while True:
             if eligible_child := next(
-                (child for child in parent.children if contains(child.bbox, bbox)), None
+                (
+                    child
+                    for child in parent.children
+                    if geo_utils.contains(child.bbox, bbox)
+                ),
+                None,
             ):
                 parent = eligible_child
             else:
@@ -99,92 +321,1395 @@ class Index:
         self._get_leaf_nodes(parent, leaf_nodes)
         return leaf_nodes
 
-    def filter_intersecting(self, nodes: list[Node], bbox: Polygon) -> list[Node]:
+    def filter_intersecting(self, nodes: list[Node], bbox: "Polygon") -> list[Node]:
         return [
             node
             for node in nodes
-            if node.bbox == bbox or get_intersection(node.bbox, bbox)
+            if node.bbox == bbox or geo_utils.get_intersection(node.bbox, bbox)
         ]
 
     def insert(self, label: str, bounds: BoundsType) -> None:
+        start = time.perf_counter() if instrumentation.enabled else 0.0
+        outcome = self._insert(label, bounds)
+        self._packed = None
+        if instrumentation.enabled:
+            instrumentation.record(
+                "rtree.Index.insert",
+                time.perf_counter() - start,
+                splits=int(outcome == "split"),
+                root_growth=int(outcome == "grown root"),
+            )
+
+    def _insert(self, label: str, bounds: BoundsType) -> str:
+        """Insert an entry, returning which of the scenarios below it went through."""
         assert (
             label not in self.labels
         ), f"Label {label} already in dataset. Must use a unique name."
-        self.labels.add(label)
-
         new_child = Node(bounds, label=label)
+        self.labels[label] = new_child
 
         # scenario 1: index is empty
         if self.root is None:
-            # TODO: add helper to standardize auto-generated labels
-            self.root = Node(bounds, label=f"New Root: {label}")
+            self.root = Node(bounds)
             self.root.add_child(new_child)
-            return
+            return "new root"
 
         # scenario 2: index has parent with bounds containing new child
-        bbox = make_box(*bounds)
+        bbox = new_child.bbox
         parent = self.find_parent_node(bbox)
         if parent:
-            if len(parent.children) < MAX_CHILDREN:
+            if len(parent.children) < self.max_children:
                 parent.add_child(new_child)
-                return
+                return "added"
 
-            # TODO: reconsider this approach if MAX_CHILDREN is increased
-            # taking the two closest children might not make sense if there are
-            # five children, and the two closest are centrally located
+            # move the children into two new parents, split on their raw bounds since
+            # GEOS unions of the zero-area boxes that represent points have no bounds
             children = parent.children + [new_child]
-            children_by_label = {child.label: child for child in children}
-            child_pairs = combinations(children, 2)
-            min_pair = next(child_pairs)
-            min_distance = get_distance(min_pair[0].bbox, min_pair[1].bbox)
-            for child_pair in child_pairs:
-                distance = get_distance(child_pair[0].bbox, child_pair[1].bbox)
-                if distance < min_distance:
-                    min_distance = distance
-                    min_pair = child_pair
-
-            for child in min_pair:
-                del children_by_label[child.label]
-
+            child_bounds = np.array([child.bounds for child in children])
             parent.reset_children()
-            new_parent_bbox = self.get_union_bbox(min_pair[0].bbox, min_pair[1].bbox)
-            new_parent = Node(
-                make_bounds(new_parent_bbox), label=f"New Parent 1: {label}"
-            )
-            new_parent.add_child(min_pair[0])
-            new_parent.add_child(min_pair[1])
-            parent.add_child(new_parent)
-
-            remaining_children = [child for child in children_by_label.values()]
-            new_parent_bbox = remaining_children[0].bbox
-            for child in remaining_children[1:]:
-                new_parent_bbox = self.get_union_bbox(new_parent_bbox, child.bbox)
-
-            new_parent = Node(
-                make_bounds(new_parent_bbox), label=f"New Parent 2: {label}"
-            )
-            for child in remaining_children:
-                new_parent.add_child(child)
-            parent.add_child(new_parent)
-            return
+            for group in SPLITS[self.split](child_bounds, self.min_children):
+                new_parent = Node(_total_bounds(child_bounds[group]).tolist())
+                for idx in group:
+                    new_parent.add_child(children[idx])
+                parent.add_child(new_parent)
+            return "split"
 
         # scenario 3: index needs new or updated parent to contain new child
-        new_root_bbox = self.get_union_bbox(self.root.bbox, bbox)
-        new_root_bounds = make_bounds(new_root_bbox)
-        if len(self.root.children) < MAX_CHILDREN:
-            self.root.update_bounds(new_root_bounds)
+        root_bounds = np.array(self.root.bounds)
+        new_root_bounds = _union(root_bounds, np.array(new_child.bounds))
+        if len(self.root.children) < self.max_children:
+            self.root.update_bounds(new_root_bounds.tolist())
             self.root.add_child(new_child)
-            return
+            return "extended root"
 
-        new_root = Node(new_root_bounds, label=f"New Root: {label}")
-        new_parent_bbox = get_difference(new_root.bbox, self.root.bbox)
-        new_parent = Node(make_bounds(new_parent_bbox), label=f"New Parent: {label}")
+        # the new parent also claims the part of the new root that the old one
+        # doesn't cover, so later entries there join it
+        new_root = Node(new_root_bounds.tolist())
+        uncovered = _uncovered_bounds(new_root_bounds, root_bounds)
+        new_parent_bounds = (
+            np.array(new_child.bounds)
+            if uncovered is None
+            else _union(uncovered, np.array(new_child.bounds))
+        )
+        new_parent = Node(new_parent_bounds.tolist())
 
         new_parent.add_child(new_child)
         new_root.add_child(new_parent)
         new_root.add_child(self.root)
         self.root = new_root
+        return "grown root"
 
-    def get_union_bbox(self, bbox_1: Polygon, bbox_2: Polygon) -> BoundsType:
-        union_geom = union(bbox_1, bbox_2) if bbox_1 != bbox_2 else bbox_1
+    def delete(self, label: str) -> None:
+        assert label in self.labels, f"Label {label} not in dataset."
+        node = self.labels.pop(label)
+        self._packed = None
+        node.label = None
+        if node.children:
+            # other entries were nested under it, keep it as their branch node
+            return
+
+        ancestors = self._find_ancestors(node)
+        ancestors[0].children.remove(node)
+        # drop the branch nodes left empty, then shrink the rest to their children
+        while not ancestors[0].children and ancestors[0].label is None:
+            empty = ancestors.pop(0)
+            if not ancestors:
+                self.root = None
+                return
+            ancestors[0].children.remove(empty)
+        for ancestor in ancestors:
+            if ancestor.label is not None:
+                break
+            bounds = _total_bounds(
+                np.array([child.bounds for child in ancestor.children])
+            ).tolist()
+            if tuple(bounds) == ancestor.bounds:
+                break
+            ancestor.update_bounds(bounds)
+
+    def update(self, label: str, bounds: BoundsType) -> None:
+        """Move an entry to new bounds, e.g. a vehicle that reported a new position."""
+        self.delete(label)
+        self.insert(label, bounds)
+
+    def _find_ancestors(self, target: Node) -> list[Node]:
+        """The nodes above target, its parent first."""
+        # parents contain their children, so only descend into nodes that contain it
+        parents: dict[int, Optional[Node]] = {id(self.root): None}
+        stack = [self.root]
+        while stack and id(target) not in parents:
+            node = stack.pop()
+            for child in node.children:  # type: ignore
+                if child is target or (
+                    child.children and _bounds_contain(child.bounds, target.bounds)
+                ):
+                    parents[id(child)] = node
+                    stack.append(child)
+        assert id(target) in parents, f"Node {target.bounds} not in the tree."
+
+        ancestors, parent = [], parents[id(target)]
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parents[id(parent)]
+        return ancestors
+
+    def get_union_bbox(self, bbox_1: "Polygon", bbox_2: "Polygon") -> BoundsType:
+        union_geom = geo_utils.union(bbox_1, bbox_2) if bbox_1 != bbox_2 else bbox_1
         return union_geom
+
+
+def _default_min_children(max_children: int) -> int:
+    # 40% of max_children, rounded to nearest: rounding down leaves small fan-outs
+    # (M <= 4) with one-child nodes, which R* reinsertion piles up into tall trees
+    return max(1, (max_children * 2 + 2) // 5)
+
+
+def _bounds_intersect(bounds_1: BoundsType, bounds_2: BoundsType) -> bool:
+    return (
+        bounds_1[0] <= bounds_2[2]
+        and bounds_1[2] >= bounds_2[0]
+        and bounds_1[1] <= bounds_2[3]
+        and bounds_1[3] >= bounds_2[1]
+    )
+
+
+def _bounds_contain(bounds_1: BoundsType, bounds_2: BoundsType) -> bool:
+    return (
+        bounds_1[0] <= bounds_2[0]
+        and bounds_1[1] <= bounds_2[1]
+        and bounds_1[2] >= bounds_2[2]
+        and bounds_1[3] >= bounds_2[3]
+    )
+
+
+def _uncovered_bounds(outer: np.ndarray, inner: np.ndarray) -> Optional[np.ndarray]:
+    """Bounds of the part of outer that inner, a box inside it, doesn't cover."""
+    low_gaps, high_gaps = inner[:2] > outer[:2], inner[2:] < outer[2:]
+    gaps = low_gaps | high_gaps
+    if not gaps.any():
+        return None
+    uncovered = outer.copy()
+    for axis in range(2):
+        # unless inner spans the other axis, the uncovered part spans this one
+        if gaps[1 - axis]:
+            continue
+        if not low_gaps[axis]:
+            uncovered[axis] = inner[axis + 2]
+        if not high_gaps[axis]:
+            uncovered[axis + 2] = inner[axis]
+    return uncovered
+
+
+def _intersects(bounds: np.ndarray, query: np.ndarray) -> np.ndarray:
+    # closed intervals, so boxes that only touch along an edge still intersect
+    # (query is either a single box or one box per row of bounds)
+    return (
+        (bounds[..., 0] <= query[..., 2])
+        & (bounds[..., 2] >= query[..., 0])
+        & (bounds[..., 1] <= query[..., 3])
+        & (bounds[..., 3] >= query[..., 1])
+    )
+
+
+def _min_distance(bounds: np.ndarray, point: np.ndarray) -> np.ndarray:
+    # distance from a point to the closest edge of each box (0 if it's inside)
+    gaps = np.maximum(bounds[..., :2] - point, 0) + np.maximum(
+        point - bounds[..., 2:], 0
+    )
+    return np.hypot(gaps[..., 0], gaps[..., 1])
+
+
+def _area(bounds: np.ndarray) -> np.ndarray:
+    return (bounds[..., 2] - bounds[..., 0]) * (bounds[..., 3] - bounds[..., 1])
+
+
+def _union(bounds_1: np.ndarray, bounds_2: np.ndarray) -> np.ndarray:
+    return np.concatenate(
+        [
+            np.minimum(bounds_1[..., :2], bounds_2[..., :2]),
+            np.maximum(bounds_1[..., 2:], bounds_2[..., 2:]),
+        ],
+        axis=-1,
+    )
+
+
+def _total_bounds(bounds: np.ndarray) -> np.ndarray:
+    return np.concatenate([bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)])
+
+
+def _check_bulk_input(labels: list[str], bounds: np.ndarray) -> np.ndarray:
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+    assert len(labels) == len(bounds), "Need exactly one bounding box per label."
+    assert len(set(labels)) == len(labels), "Labels must be unique."
+    return bounds
+
+
+def _str_pack(bounds: np.ndarray, node_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sort-Tile-Recursive packing: sort the boxes by x, cut them into vertical slices
+    that each hold enough boxes for about sqrt(node count) full nodes, then sort each
+    slice by y and chunk it into nodes of node_size boxes.
+
+    Returns the boxes' order, so that consecutive runs make up the new nodes, and the
+    size of each run.
+    """
+    centers = (bounds[:, :2] + bounds[:, 2:]) / 2
+    node_count = math.ceil(len(bounds) / node_size)
+    slice_size = math.ceil(math.sqrt(node_count)) * node_size
+
+    tiles, sizes = [], []
+    by_x = np.argsort(centers[:, 0], kind="stable")
+    for slice_start in range(0, len(bounds), slice_size):
+        tile = by_x[slice_start : slice_start + slice_size]
+        tiles.append(tile[np.argsort(centers[tile, 1], kind="stable")])
+        full_nodes, remainder = divmod(len(tile), node_size)
+        sizes.extend([node_size] * full_nodes + ([remainder] if remainder else []))
+    return np.concatenate(tiles), np.array(sizes, dtype=np.int64)
+
+
+def _hilbert_pack(bounds: np.ndarray, node_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Hilbert packing: sort the boxes by the Hilbert code of their centres and chunk
+    that order into nodes of node_size boxes. Cheaper than STR and every node is a
+    compact run of the curve, although its nodes overlap a little more.
+    """
+    full_nodes, remainder = divmod(len(bounds), node_size)
+    sizes = [node_size] * full_nodes + ([remainder] if remainder else [])
+    return space_filling.curve_order(bounds), np.array(sizes, dtype=np.int64)
+
+
+PACKINGS = {"str": _str_pack, "hilbert": _hilbert_pack}
+
+
+def _overlap(bounds_1: np.ndarray, bounds_2: np.ndarray) -> np.ndarray:
+    widths = np.minimum(bounds_1[..., 2:], bounds_2[..., 2:]) - np.maximum(
+        bounds_1[..., :2], bounds_2[..., :2]
+    )
+    return np.prod(np.clip(widths, 0, None), axis=-1)
+
+
+def _margin(bounds: np.ndarray) -> np.ndarray:
+    return (bounds[..., 2] - bounds[..., 0]) + (bounds[..., 3] - bounds[..., 1])
+
+
+def _distribute(
+    bounds: np.ndarray, seed_1: int, seed_2: int, min_children: int, pick_next: bool
+) -> tuple[list[int], list[int]]:
+    """
+    Grow two groups from their seeds, handing each remaining box to the group whose
+    bbox it enlarges least (ties: smaller area, then fewer boxes). With pick_next the
+    box with the strongest preference for one group goes first, otherwise boxes are
+    taken in their original order.
+    """
+    groups: tuple[list[int], list[int]] = ([seed_1], [seed_2])
+    group_bounds = [bounds[seed_1], bounds[seed_2]]
+    remaining = [idx for idx in range(len(bounds)) if idx not in (seed_1, seed_2)]
+    while remaining:
+        # make sure both groups end up with at least min_children entries
+        for group_idx, group in enumerate(groups):
+            if len(group) + len(remaining) == min_children:
+                group.extend(remaining)
+                group_bounds[group_idx] = _total_bounds(bounds[group])
+                remaining = []
+        if not remaining:
+            break
+
+        candidates = bounds[remaining]
+        enlargements = [
+            _area(_union(candidates, group_bbox)) - _area(group_bbox)
+            for group_bbox in group_bounds
+        ]
+        pick = (
+            int(np.argmax(np.abs(enlargements[0] - enlargements[1])))
+            if pick_next
+            else 0
+        )
+        idx = remaining.pop(pick)
+
+        enlargement_1, enlargement_2 = enlargements[0][pick], enlargements[1][pick]
+        if enlargement_1 != enlargement_2:
+            group_idx = 0 if enlargement_1 < enlargement_2 else 1
+        elif _area(group_bounds[0]) != _area(group_bounds[1]):
+            group_idx = 0 if _area(group_bounds[0]) < _area(group_bounds[1]) else 1
+        else:
+            group_idx = 0 if len(groups[0]) <= len(groups[1]) else 1
+        groups[group_idx].append(idx)
+        group_bounds[group_idx] = _union(group_bounds[group_idx], bounds[idx])
+
+    return groups
+
+
+def _linear_split(bounds: np.ndarray, min_children: int) -> tuple[list[int], list[int]]:
+    """
+    Guttman's linear split: on each axis find the box with the highest low side and
+    the box with the lowest high side, seed the groups with the pair that is farthest
+    apart relative to the width of the whole set, then hand out the rest in order.
+    """
+    highest_lows = np.argmax(bounds[:, :2], axis=0)
+    lowest_highs = np.argmin(bounds[:, 2:], axis=0)
+    axes = np.arange(2)
+    separations = bounds[highest_lows, axes] - bounds[lowest_highs, axes + 2]
+    widths = bounds[:, 2:].max(axis=0) - bounds[:, :2].min(axis=0)
+    separations = separations / np.where(widths > 0, widths, 1)
+
+    axis = int(np.argmax(separations))
+    seed_1, seed_2 = int(lowest_highs[axis]), int(highest_lows[axis])
+    if seed_1 == seed_2:
+        seed_2 = 1 if seed_1 == 0 else 0
+    return _distribute(bounds, seed_1, seed_2, min_children, pick_next=False)
+
+
+def _quadratic_split(
+    bounds: np.ndarray, min_children: int
+) -> tuple[list[int], list[int]]:
+    """
+    Guttman's quadratic split: seed the two groups with the pair of boxes that would
+    waste the most area if grouped together, then hand out the remaining boxes in
+    order of strongest preference for one group over the other.
+    """
+    pair_union = _union(bounds[:, None, :], bounds[None, :, :])
+    waste = _area(pair_union) - _area(bounds)[:, None] - _area(bounds)[None, :]
+    np.fill_diagonal(waste, -np.inf)
+    seed_1, seed_2 = np.unravel_index(np.argmax(waste), waste.shape)
+    return _distribute(bounds, int(seed_1), int(seed_2), min_children, pick_next=True)
+
+
+def _rstar_split(bounds: np.ndarray, min_children: int) -> tuple[list[int], list[int]]:
+    """
+    R*-tree split: for each axis, sort the boxes by their low and by their high side
+    and consider every split of the sorted list that leaves min_children on each side.
+    Pick the axis whose candidate splits have the smallest total margin (perimeter),
+    then the split on that axis with the least overlap between the two groups (ties:
+    least total area).
+    """
+    group_sizes = np.arange(min_children, len(bounds) - min_children + 1)
+    best_margin, best_split = np.inf, None
+    for axis in range(2):
+        margin, candidates = 0.0, []
+        for order in (
+            np.lexsort((bounds[:, axis + 2], bounds[:, axis])),
+            np.lexsort((bounds[:, axis], bounds[:, axis + 2])),
+        ):
+            # bboxes of every prefix and every suffix of the sorted boxes
+            ordered = bounds[order]
+            prefixes = np.hstack(
+                [
+                    np.minimum.accumulate(ordered[:, :2]),
+                    np.maximum.accumulate(ordered[:, 2:]),
+                ]
+            )
+            suffixes = np.hstack(
+                [
+                    np.minimum.accumulate(ordered[::-1, :2])[::-1],
+                    np.maximum.accumulate(ordered[::-1, 2:])[::-1],
+                ]
+            )
+            group_1, group_2 = prefixes[group_sizes - 1], suffixes[group_sizes]
+            margin += float(np.sum(_margin(group_1) + _margin(group_2)))
+            overlap = _overlap(group_1, group_2)
+            area = _area(group_1) + _area(group_2)
+            best = np.lexsort((area, overlap))[0]
+            candidates.append((overlap[best], area[best], order, group_sizes[best]))
+
+        if margin < best_margin:
+            best_margin = margin
+            best_split = min(candidates, key=lambda candidate: candidate[:2])
+
+    _, _, order, size = best_split  # type: ignore
+    return order[:size].tolist(), order[size:].tolist()
+
+
+SPLITS = {
+    "linear": _linear_split,
+    "quadratic": _quadratic_split,
+    "rstar": _rstar_split,
+}
+# Index only has the splits that don't rely on R* subtree choice and reinsertion
+INDEX_SPLITS = ("linear", "quadratic")
+# share of an overflowing node's children that R* reinserts before splitting
+REINSERT_FRACTION = 0.3
+
+# saved index layout: header, then the arrays from _array_layout, the label offsets and
+# the utf-8 label bytes (every array holds 8-byte items, so they all stay aligned)
+INDEX_MAGIC = b"GARTREE1"
+INDEX_HEADER = struct.Struct("<8s8q")
+
+
+class _LabelTable:
+    """Entry labels decoded on demand from a saved index's string table."""
+
+    def __init__(
+        self, offsets: np.ndarray, label_bytes: np.ndarray, parents: np.ndarray
+    ) -> None:
+        self.offsets = offsets
+        self.label_bytes = label_bytes
+        self.parents = parents
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __getitem__(self, entry: int) -> Optional[str]:
+        # deleted entries aren't attached to a leaf
+        if self.parents[entry] == -1:
+            return None
+        start, end = self.offsets[entry], self.offsets[entry + 1]
+        return self.label_bytes[start:end].tobytes().decode()
+
+
+class _LazyLabels(Mapping):
+    """Label -> entry lookup for a saved index, only built if it is actually used."""
+
+    def __init__(self, table: _LabelTable, size: int) -> None:
+        self.table = table
+        self.size = size
+        self._labels: Optional[dict[str, int]] = None
+
+    def _load(self) -> dict[str, int]:
+        if self._labels is None:
+            self._labels = {
+                label: entry
+                for entry in range(len(self.table))
+                if (label := self.table[entry]) is not None
+            }
+        return self._labels
+
+    def __getitem__(self, label: str) -> int:
+        return self._load()[label]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class ArrayIndex:
+    """
+    Array-backed storage mode for the R-tree.
+
+    Instead of a Node object with a shapely bbox per tree node, every node lives in a
+    row of a few preallocated NumPy arrays:
+    - node bounds: (capacity, 4) float64 of minx, miny, maxx, maxy
+    - node children: (capacity, max_children + 1) int64 child offsets, padded with -1
+      (one spare slot lets a node overflow before it is split)
+    - node levels: 0 for leaf nodes, whose children are offsets into the entry arrays
+    Inserted entries get a row in a matching (capacity, 4) entry bounds array.
+
+    Containment and intersection tests are done with plain arithmetic on those arrays,
+    so insert and search never call into GEOS.
+
+    The fan-out and split policy are configurable: nodes hold between min_children
+    and max_children children (min_children defaults to 40% of max_children, rounded
+    to nearest), and an overflowing node is split with Guttman's "linear" or
+    "quadratic" algorithm, or with the "rstar" policy, which also picks subtrees by
+    least overlap enlargement and reinserts the children farthest from an
+    overflowing node's center once per level before falling back to a split.
+    """
+
+    def __init__(
+        self,
+        max_children: int = MAX_CHILDREN,
+        min_children: Optional[int] = None,
+        split: str = "quadratic",
+    ) -> None:
+        if min_children is None:
+            min_children = _default_min_children(max_children)
+        assert max_children >= 2, "Nodes need room for at least two children."
+        assert (
+            1 <= min_children <= max_children // 2
+        ), "min_children must be between 1 and half of max_children."
+        assert split in SPLITS, f"Unknown split {split}, must be one of {list(SPLITS)}."
+        self.max_children = max_children
+        self.min_children = min_children
+        self.split = split
+        self._reinserted_levels: set[int] = set()
+        self.nodes_visited = 0
+        self.splits = 0
+        # set for indexes served from a memory-mapped file
+        self.read_only = False
+
+        self.root = -1
+        # label -> offset of its entry
+        self.labels: Union[dict[str, int], _LazyLabels] = {}
+
+        self._entry_labels: Union[list[Optional[str]], _LabelTable] = []
+        self._entry_bounds = np.empty((INITIAL_CAPACITY, 4))
+        self._entry_parents = np.full(INITIAL_CAPACITY, -1, dtype=np.int64)
+        self._entry_count = 0
+
+        self._node_bounds = np.empty((INITIAL_CAPACITY, 4))
+        self._node_children = np.full(
+            (INITIAL_CAPACITY, max_children + 1), -1, dtype=np.int64
+        )
+        self._node_counts = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self._node_levels = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self._node_parents = np.full(INITIAL_CAPACITY, -1, dtype=np.int64)
+        self._node_count = 0
+
+        # rows freed by delete, reused before the arrays grow
+        self._free_entries: list[int] = []
+        self._free_nodes: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def bulk_load(
+        cls,
+        labels: list[str],
+        bounds: np.ndarray,
+        max_children: int = MAX_CHILDREN,
+        min_children: Optional[int] = None,
+        split: str = "quadratic",
+        packing: str = "str",
+    ) -> "ArrayIndex":
+        """
+        Build a fully packed tree, grouping the boxes into nodes with "str" or
+        "hilbert" packing. The fan-out and split policy only matter for entries
+        inserted afterwards.
+        """
+        index = cls(max_children, min_children, split)
+        bounds = _check_bulk_input(labels, bounds)
+        assert (
+            packing in PACKINGS
+        ), f"Unknown packing {packing}, must be one of {list(PACKINGS)}."
+        if not len(labels):
+            return index
+        index.labels = dict(zip(labels, range(len(labels))))
+
+        capacity = max(len(bounds), INITIAL_CAPACITY)
+        index._entry_bounds = np.empty((capacity, 4))
+        index._entry_bounds[: len(bounds)] = bounds
+        index._entry_parents = np.full(capacity, -1, dtype=np.int64)
+        index._entry_labels = list(labels)
+        index._entry_count = len(bounds)
+
+        level, level_ids, level_bounds = 0, np.arange(len(bounds)), bounds
+        while True:
+            order, sizes = PACKINGS[packing](level_bounds, index.max_children)
+            nodes = index._add_nodes(level, len(sizes))
+            index._fill_nodes(nodes, level_ids[order], sizes)
+            if len(nodes) == 1:
+                index.root = int(nodes[0])
+                return index
+
+            level += 1
+            level_ids, level_bounds = nodes, index._node_bounds[nodes]
+
+    def _array_layout(
+        self, node_count: int, entry_count: int
+    ) -> list[tuple[str, tuple[int, ...], str]]:
+        # attribute, shape and dtype of every array needed to answer queries
+        return [
+            ("_node_bounds", (node_count, 4), "<f8"),
+            ("_node_children", (node_count, self.max_children + 1), "<i8"),
+            ("_node_counts", (node_count,), "<i8"),
+            ("_node_levels", (node_count,), "<i8"),
+            ("_node_parents", (node_count,), "<i8"),
+            ("_entry_bounds", (entry_count, 4), "<f8"),
+            ("_entry_parents", (entry_count,), "<i8"),
+        ]
+
+    def _dump(self) -> list[Union[bytes, np.ndarray]]:
+        # the saved layout, as the buffers to write one after the other
+        node_count, entry_count = self._node_count, self._entry_count
+        encoded = [
+            (self._entry_labels[entry] or "").encode() for entry in range(entry_count)
+        ]
+        label_offsets = np.zeros(entry_count + 1, dtype="<i8")
+        label_offsets[1:] = np.cumsum([len(label) for label in encoded])
+        label_bytes = b"".join(encoded)
+
+        header = INDEX_HEADER.pack(
+            INDEX_MAGIC,
+            node_count,
+            entry_count,
+            self.max_children,
+            self.min_children,
+            list(SPLITS).index(self.split),
+            self.root,
+            len(self),
+            len(label_bytes),
+        )
+        arrays = [
+            np.ascontiguousarray(getattr(self, name)[: shape[0]], dtype)
+            for name, shape, dtype in self._array_layout(node_count, entry_count)
+        ]
+        return [header, *arrays, label_offsets, label_bytes]
+
+    @classmethod
+    def _load(cls, buffer: np.ndarray, read_only: bool) -> "ArrayIndex":
+        # rebuild an index on top of a uint8 buffer holding the saved layout; the
+        # arrays are views of the buffer, so nothing is copied
+        header = INDEX_HEADER.unpack(buffer[: INDEX_HEADER.size].tobytes())
+        (
+            magic,
+            node_count,
+            entry_count,
+            max_children,
+            min_children,
+            split_code,
+            root,
+            size,
+            label_bytes_size,
+        ) = header
+        assert magic == INDEX_MAGIC, "Buffer doesn't hold a saved ArrayIndex."
+
+        index = cls(max_children, min_children, list(SPLITS)[split_code])
+        offset = INDEX_HEADER.size
+
+        def read(shape: tuple[int, ...], dtype: str) -> np.ndarray:
+            nonlocal offset
+            array_bytes = math.prod(shape) * np.dtype(dtype).itemsize
+            array = buffer[offset : offset + array_bytes].view(dtype).reshape(shape)
+            if read_only:
+                array.flags.writeable = False
+            offset += array_bytes
+            return array
+
+        for name, shape, dtype in index._array_layout(node_count, entry_count):
+            setattr(index, name, read(shape, dtype))
+        label_offsets = read((entry_count + 1,), "<i8")
+        label_table = _LabelTable(
+            label_offsets, read((label_bytes_size,), "u1"), index._entry_parents
+        )
+
+        index.root = root
+        index._node_count = node_count
+        index._entry_count = entry_count
+        if read_only:
+            index.read_only = True
+            index._entry_labels = label_table
+            index.labels = _LazyLabels(label_table, size)
+            return index
+
+        index._entry_labels = [label_table[entry] for entry in range(entry_count)]
+        index.labels = {
+            label: entry
+            for entry, label in enumerate(index._entry_labels)
+            if label is not None
+        }
+        index._free_entries = np.flatnonzero(index._entry_parents == -1).tolist()
+        index._free_nodes = [
+            node
+            for node in np.flatnonzero(index._node_parents == -1).tolist()
+            if node != root
+        ]
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a flat binary file: a small header, the node and entry
+        arrays as raw little-endian bytes, then a string table of the labels.
+        """
+        with open(path, "wb") as file:
+            for part in self._dump():
+                file.write(part)
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> "ArrayIndex":
+        """
+        Load an index written by save. With mmap, the arrays are read-only views of
+        the file, so opening is instant, nothing is deserialized until a query
+        touches it, and every process that opens the file shares one copy of it in
+        the page cache. Without mmap, the file is read into a regular, writable index.
+        """
+        if mmap:
+            return cls._load(np.memmap(path, "u1", mode="r"), read_only=True)
+        return cls._load(np.fromfile(path, "u1"), read_only=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the node and entry arrays (including spare capacity)."""
+        return sum(
+            array.nbytes
+            for array in (
+                self._entry_bounds,
+                self._entry_parents,
+                self._node_bounds,
+                self._node_children,
+                self._node_counts,
+                self._node_levels,
+                self._node_parents,
+            )
+        )
+
+    def search(self, bounds: BoundsType) -> list[Node]:
+        return [
+            Node(self._entry_bounds[entry].tolist(), label=self._entry_labels[entry])
+            for entry in self.search_ids(bounds)
+        ]
+
+    @property
+    def height(self) -> int:
+        return 0 if self.root == -1 else int(self._node_levels[self.root]) + 1
+
+    def get_labels(self, entries: np.ndarray) -> list[str]:
+        return [self._entry_labels[entry] for entry in entries]  # type: ignore
+
+    def search_many(self, bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Answer an (N, 4) array of queries at once. The tree is walked one level at a
+        time, testing every (query, node) pair on the frontier against the node's
+        children in a handful of NumPy operations.
+
+        Returns (query_idx, entry_idx) arrays sorted by query, so the hits for query
+        i are entry_idx[offsets[i] : offsets[i + 1]] with
+        offsets = np.searchsorted(query_idx, np.arange(N + 1)).
+        """
+        queries = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        if self.root == -1:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        pair_queries = np.flatnonzero(
+            _intersects(queries, self._node_bounds[self.root])
+        )
+        pair_nodes = np.full(len(pair_queries), self.root, dtype=np.int64)
+        slots = np.arange(self._node_children.shape[1])
+        level = self._node_levels[self.root]
+        while True:
+            counts = self._node_counts[pair_nodes]
+            children = self._node_children[pair_nodes][slots < counts[:, None]]
+            child_queries = np.repeat(pair_queries, counts)
+            child_bounds = (
+                self._entry_bounds[children]
+                if level == 0
+                else self._node_bounds[children]
+            )
+            hits = _intersects(child_bounds, queries[child_queries])
+            pair_queries, pair_nodes = child_queries[hits], children[hits]
+            if level == 0:
+                break
+            level -= 1
+
+        order = np.argsort(pair_queries, kind="stable")
+        return pair_queries[order], pair_nodes[order]
+
+    def nearest(
+        self,
+        point: PointType,
+        k: Optional[int] = 1,
+        max_distance: Optional[float] = None,
+    ) -> Iterator[tuple[str, float]]:
+        """
+        Yield (label, distance) for the k entries closest to the point, nearest first
+        (k=None yields every entry within max_distance). Distances are Euclidean in
+        the units of the coordinates, measured to the edge of each entry's bbox.
+
+        Best-first branch and bound: a priority queue holds nodes and entries keyed on
+        their minimum distance to the point, so a node is only opened once nothing
+        closer is left. Being a generator, neighbours are found lazily and callers
+        can stop early.
+        """
+        if self.root == -1:
+            return
+
+        target = np.asarray(point, dtype=np.float64)
+        tiebreak = count()
+        # (distance, tiebreak, is_entry, offset)
+        queue = [
+            (
+                float(_min_distance(self._node_bounds[self.root], target)),
+                0,
+                False,
+                self.root,
+            )
+        ]
+        found = 0
+        while queue and (k is None or found < k):
+            distance, _, is_entry, item = heapq.heappop(queue)
+            if max_distance is not None and distance > max_distance:
+                return
+            if is_entry:
+                yield self._entry_labels[item], distance  # type: ignore
+                found += 1
+                continue
+
+            children, child_bounds = self._get_children(item)
+            is_leaf = bool(self._node_levels[item] == 0)
+            distances = _min_distance(child_bounds, target)
+            for child, child_distance in zip(children.tolist(), distances.tolist()):
+                if max_distance is None or child_distance <= max_distance:
+                    heapq.heappush(
+                        queue, (child_distance, next(tiebreak), is_leaf, child)
+                    )
+
+    def search_ids(self, bounds: BoundsType) -> np.ndarray:
+        """
+        Same as search, but returns offsets into the entry arrays.
+        Sets nodes_visited to the number of nodes whose children were tested.
+        """
+        start = time.perf_counter() if instrumentation.enabled else 0.0
+        self.nodes_visited = children_tested = 0
+        query = np.asarray(bounds, dtype=np.float64)
+        found = [np.empty(0, dtype=np.int64)]
+        if self.root != -1 and _intersects(self._node_bounds[[self.root]], query)[0]:
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                self.nodes_visited += 1
+                children, child_bounds = self._get_children(node)
+                children_tested += len(children)
+                hits = children[_intersects(child_bounds, query)]
+                if self._node_levels[node] == 0:
+                    found.append(hits)
+                else:
+                    stack.extend(hits.tolist())
+
+        entries = np.concatenate(found)
+        if instrumentation.enabled:
+            instrumentation.record(
+                "rtree.ArrayIndex.search_ids",
+                time.perf_counter() - start,
+                nodes_visited=self.nodes_visited,
+                children_tested=children_tested,
+                results=len(entries),
+            )
+        return entries
+
+    def insert(self, label: str, bounds: BoundsType) -> None:
+        """Sets splits to the number of nodes split to make room for the entry."""
+        assert not self.read_only, "Index is read-only."
+        assert (
+            label not in self.labels
+        ), f"Label {label} already in dataset. Must use a unique name."
+        start = time.perf_counter() if instrumentation.enabled else 0.0
+        height = self.height
+        entry = self._add_entry(label, bounds)
+        self.labels[label] = entry
+        self._insert_entry(entry)
+        if instrumentation.enabled:
+            instrumentation.record(
+                "rtree.ArrayIndex.insert",
+                time.perf_counter() - start,
+                splits=self.splits,
+                root_growth=int(self.height > max(height, 1)),
+            )
+
+    def delete(self, label: str) -> None:
+        assert not self.read_only, "Index is read-only."
+        assert label in self.labels, f"Label {label} not in dataset."
+        entry = self.labels.pop(label)
+        self._detach_entry(entry)
+        self._entry_labels[entry] = None
+        self._free_entries.append(entry)
+
+    def update(self, label: str, bounds: BoundsType) -> None:
+        """Move an entry to new bounds, e.g. a vehicle that reported a new position."""
+        assert not self.read_only, "Index is read-only."
+        assert label in self.labels, f"Label {label} not in dataset."
+        entry = self.labels[label]
+        leaf = int(self._entry_parents[entry])
+        new_bounds = np.asarray(bounds, dtype=np.float64)
+
+        # still inside its leaf: just update in place and shrink the ancestors
+        leaf_bounds = self._node_bounds[leaf]
+        if np.all(leaf_bounds[:2] <= new_bounds[:2]) and np.all(
+            leaf_bounds[2:] >= new_bounds[2:]
+        ):
+            self._entry_bounds[entry] = new_bounds
+            self._tighten_bounds(leaf)
+            return
+
+        self._detach_entry(entry)
+        self._entry_bounds[entry] = new_bounds
+        self._insert_entry(entry)
+
+    def _insert_entry(self, entry: int) -> None:
+        if self.root == -1:
+            self.root = self._add_node(level=0)
+
+        self._reinserted_levels = set()
+        self.splits = 0
+        self._insert_child(entry, level=0)
+
+    def _detach_entry(self, entry: int) -> None:
+        """
+        Guttman's CondenseTree: take the entry out of its leaf, then walk up to the
+        root, dissolving nodes that fell below min_children and tightening the
+        bounds of the rest. Children of dissolved nodes are reinserted at their
+        original level, and a root left with a single child is replaced by it.
+        """
+        node = int(self._entry_parents[entry])
+        self._remove_child(node, entry)
+        self._entry_parents[entry] = -1
+
+        orphans: list[tuple[int, int]] = []
+        while node != self.root:
+            parent = int(self._node_parents[node])
+            if self._node_counts[node] < self.min_children:
+                self._remove_child(parent, node)
+                level = int(self._node_levels[node])
+                children, _ = self._get_children(node)
+                orphans.extend((child, level) for child in children.tolist())
+                self._free_node(node)
+            else:
+                _, child_bounds = self._get_children(node)
+                self._node_bounds[node] = _total_bounds(child_bounds)
+            node = parent
+
+        if self._node_counts[self.root] == 0:
+            self._free_node(self.root)
+            self.root = -1
+        else:
+            _, child_bounds = self._get_children(self.root)
+            self._node_bounds[self.root] = _total_bounds(child_bounds)
+
+        self._reinserted_levels = set()
+        for child, level in orphans:
+            self._insert_child(child, level)
+
+        while (
+            self.root != -1
+            and self._node_levels[self.root] > 0
+            and self._node_counts[self.root] == 1
+        ):
+            old_root = self.root
+            self.root = int(self._node_children[old_root, 0])
+            self._node_parents[self.root] = -1
+            self._free_node(old_root)
+
+    def _remove_child(self, node: int, child: int) -> None:
+        count = self._node_counts[node]
+        children = self._node_children[node]
+        slot = int(np.flatnonzero(children[:count] == child)[0])
+        children[slot] = children[count - 1]
+        children[count - 1] = -1
+        self._node_counts[node] = count - 1
+
+    def _free_node(self, node: int) -> None:
+        self._node_children[node] = -1
+        self._node_counts[node] = 0
+        self._node_parents[node] = -1
+        self._free_nodes.append(node)
+
+    def _insert_child(self, child: int, level: int) -> None:
+        """Place an entry (level 0) or a subtree into a node at the given level."""
+        bbox = self._entry_bounds[child] if level == 0 else self._node_bounds[child]
+        node = self._choose_node(bbox, level)
+        self._add_child(node, child)
+        self._handle_overflow(node)
+
+    def _get_children(self, node: int) -> tuple[np.ndarray, np.ndarray]:
+        children = self._node_children[node, : self._node_counts[node]]
+        if self._node_levels[node] == 0:
+            return children, self._entry_bounds[children]
+        return children, self._node_bounds[children]
+
+    def _add_entry(self, label: str, bounds: BoundsType) -> int:
+        if self._free_entries:
+            entry = self._free_entries.pop()
+            self._entry_bounds[entry] = bounds
+            self._entry_labels[entry] = label
+            return entry
+
+        if self._entry_count == len(self._entry_bounds):
+            self._entry_bounds = _grow(self._entry_bounds)
+            self._entry_parents = _grow(self._entry_parents, fill=-1)
+
+        entry = self._entry_count
+        self._entry_bounds[entry] = bounds
+        self._entry_labels.append(label)
+        self._entry_count += 1
+        return entry
+
+    def _add_node(self, level: int) -> int:
+        if self._free_nodes:
+            node = self._free_nodes.pop()
+            self._node_levels[node] = level
+            return node
+        return int(self._add_nodes(level, 1)[0])
+
+    def _add_nodes(self, level: int, count: int) -> np.ndarray:
+        while self._node_count + count > len(self._node_bounds):
+            self._node_bounds = _grow(self._node_bounds)
+            self._node_children = _grow(self._node_children, fill=-1)
+            self._node_counts = _grow(self._node_counts, fill=0)
+            self._node_levels = _grow(self._node_levels, fill=0)
+            self._node_parents = _grow(self._node_parents, fill=-1)
+
+        nodes = np.arange(self._node_count, self._node_count + count)
+        self._node_levels[nodes] = level
+        self._node_counts[nodes] = 0
+        self._node_parents[nodes] = -1
+        self._node_count += count
+        return nodes
+
+    def _fill_nodes(
+        self, nodes: np.ndarray, children: np.ndarray, sizes: np.ndarray
+    ) -> None:
+        """Give each of the (empty) nodes the next sizes[i] children, all at once."""
+        offsets = np.cumsum(sizes) - sizes
+        rows = np.repeat(nodes, sizes)
+        slots = np.arange(len(children)) - np.repeat(offsets, sizes)
+        self._node_children[rows, slots] = children
+        self._node_counts[nodes] = sizes
+
+        if self._node_levels[nodes[0]] == 0:
+            self._entry_parents[children] = rows
+            child_bounds = self._entry_bounds[children]
+        else:
+            self._node_parents[children] = rows
+            child_bounds = self._node_bounds[children]
+        self._node_bounds[nodes, :2] = np.minimum.reduceat(child_bounds[:, :2], offsets)
+        self._node_bounds[nodes, 2:] = np.maximum.reduceat(child_bounds[:, 2:], offsets)
+
+    def _choose_node(self, bounds: np.ndarray, level: int) -> int:
+        # descend into the child needing the least enlargement (ties: smallest area)
+        node = self.root
+        while self._node_levels[node] > level:
+            children, child_bounds = self._get_children(node)
+            areas = _area(child_bounds)
+            enlarged = _union(child_bounds, bounds)
+            enlargements = _area(enlarged) - areas
+            if self.split == "rstar" and self._node_levels[node] == level + 1:
+                # R*: right above the target level, minimize the added overlap first
+                overlaps = _overlap(child_bounds[:, None], child_bounds[None, :])
+                enlarged_overlaps = _overlap(enlarged[:, None], child_bounds[None, :])
+                np.fill_diagonal(overlaps, 0)
+                np.fill_diagonal(enlarged_overlaps, 0)
+                overlap_enlargements = (enlarged_overlaps - overlaps).sum(axis=1)
+                order = np.lexsort((areas, enlargements, overlap_enlargements))
+            else:
+                order = np.lexsort((areas, enlargements))
+            node = int(children[order[0]])
+        return node
+
+    def _add_child(self, node: int, child: int) -> None:
+        count = self._node_counts[node]
+        self._node_children[node, count] = child
+        self._node_counts[node] = count + 1
+        if self._node_levels[node] == 0:
+            self._entry_parents[child] = node
+            child_bbox = self._entry_bounds[child]
+        else:
+            self._node_parents[child] = node
+            child_bbox = self._node_bounds[child]
+
+        if count == 0:
+            self._node_bounds[node] = child_bbox
+        self._extend_bounds(node, child_bbox)
+
+    def _extend_bounds(self, node: int, bounds: np.ndarray) -> None:
+        # grow ancestors until one already contains the new bounds
+        while node != -1:
+            extended = _union(self._node_bounds[node], bounds)
+            if np.array_equal(extended, self._node_bounds[node]):
+                return
+            self._node_bounds[node] = extended
+            node = self._node_parents[node]
+
+    def _set_children(self, node: int, children: np.ndarray) -> None:
+        self._node_children[node] = -1
+        self._node_children[node, : len(children)] = children
+        self._node_counts[node] = len(children)
+        if self._node_levels[node] == 0:
+            self._entry_parents[children] = node
+            self._node_bounds[node] = _total_bounds(self._entry_bounds[children])
+        else:
+            self._node_parents[children] = node
+            self._node_bounds[node] = _total_bounds(self._node_bounds[children])
+
+    def _tighten_bounds(self, node: int) -> None:
+        # shrink ancestors after children were taken out of a node
+        while node != -1:
+            _, child_bounds = self._get_children(node)
+            self._node_bounds[node] = _total_bounds(child_bounds)
+            node = self._node_parents[node]
+
+    def _reinsert(self, node: int) -> None:
+        """R* forced reinsertion of the children farthest from the node's center."""
+        children, child_bounds = self._get_children(node)
+        centers = (child_bounds[:, :2] + child_bounds[:, 2:]) / 2
+        node_center = (self._node_bounds[node, :2] + self._node_bounds[node, 2:]) / 2
+        by_distance = np.argsort(((centers - node_center) ** 2).sum(axis=1))
+        reinsert_count = max(1, int(REINSERT_FRACTION * self.max_children))
+        keep = children[by_distance[:-reinsert_count]]
+        # closest first ("close reinsert")
+        reinsert = children[by_distance[-reinsert_count:]].tolist()
+
+        self._set_children(node, keep)
+        self._tighten_bounds(self._node_parents[node])
+        level = int(self._node_levels[node])
+        for child in reinsert:
+            self._insert_child(child, level)
+
+    def _handle_overflow(self, node: int) -> None:
+        while self._node_counts[node] > self.max_children:
+            level = int(self._node_levels[node])
+            if (
+                self.split == "rstar"
+                and node != self.root
+                and level not in self._reinserted_levels
+            ):
+                self._reinserted_levels.add(level)
+                self._reinsert(node)
+                return
+
+            children, child_bounds = self._get_children(node)
+            group_1, group_2 = SPLITS[self.split](child_bounds, self.min_children)
+            children = children.copy()
+
+            self.splits += 1
+            sibling = self._add_node(level=self._node_levels[node])
+            self._set_children(node, children[group_1])
+            self._set_children(sibling, children[group_2])
+
+            parent = self._node_parents[node]
+            if parent == -1:
+                # root split: grow the tree by one level
+                self.root = self._add_node(level=self._node_levels[node] + 1)
+                self._add_child(self.root, node)
+                self._add_child(self.root, sibling)
+                return
+
+            self._add_child(parent, sibling)
+            node = parent
+
+
+def _grow(array: np.ndarray, fill: Optional[int] = None) -> np.ndarray:
+    """Double the first dimension of an array, keeping existing rows."""
+    grown = np.empty((len(array) * 2, *array.shape[1:]), dtype=array.dtype)
+    grown[: len(array)] = array
+    if fill is not None:
+        grown[len(array) :] = fill
+    return grown
+
+
+def _contains(bounds_1: np.ndarray, bounds_2: np.ndarray) -> np.ndarray:
+    return np.all(bounds_1[..., :2] <= bounds_2[..., :2], axis=-1) & np.all(
+        bounds_1[..., 2:] >= bounds_2[..., 2:], axis=-1
+    )
+
+
+JOIN_PREDICATES = {
+    "intersects": _intersects,
+    "contains": _contains,
+    "within": lambda bounds_1, bounds_2: _contains(bounds_2, bounds_1),
+}
+JOIN_CHUNK_SIZE = 65_536
+
+
+def _expand(index: ArrayIndex, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Children of each node, and the position in nodes each child came from."""
+    counts = index._node_counts[nodes]
+    slots = np.arange(index._node_children.shape[1])
+    children = index._node_children[nodes][slots < counts[:, None]]
+    return children, np.repeat(np.arange(len(nodes)), counts)
+
+
+def spatial_join_chunks(
+    index_a: ArrayIndex,
+    index_b: ArrayIndex,
+    predicate: str = "intersects",
+    chunk_size: int = JOIN_CHUNK_SIZE,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Walk both trees at once and yield (entries_a, entries_b) arrays of at most
+    chunk_size matching pairs of entry offsets.
+
+    The traversal keeps a stack of frontiers of (node_a, node_b) pairs whose bboxes
+    overlap. Each step descends both sides (or only the taller tree, until both are
+    at the same level) and tests every pair of children in bulk, so only pairs of
+    overlapping subtrees are ever opened. Frontiers larger than chunk_size are split
+    before they are expanded, which keeps memory bounded however large the join is.
+
+    The predicate ("intersects", "contains" or "within", as in a contains b) is
+    evaluated on the entries' bounding boxes.
+    """
+    assert (
+        predicate in JOIN_PREDICATES
+    ), f"Unknown predicate {predicate}, must be one of {list(JOIN_PREDICATES)}."
+    if index_a.root == -1 or index_b.root == -1:
+        return
+    if not _intersects(
+        index_a._node_bounds[index_a.root], index_b._node_bounds[index_b.root]
+    ):
+        return
+
+    pending_a: list[np.ndarray] = []
+    pending_b: list[np.ndarray] = []
+    pending_count = 0
+    stack = [
+        (
+            np.array([index_a.root], dtype=np.int64),
+            np.array([index_b.root], dtype=np.int64),
+        )
+    ]
+    while stack:
+        nodes_a, nodes_b = stack.pop()
+        if len(nodes_a) > chunk_size:
+            half = len(nodes_a) // 2
+            stack.append((nodes_a[half:], nodes_b[half:]))
+            stack.append((nodes_a[:half], nodes_b[:half]))
+            continue
+
+        level_a = index_a._node_levels[nodes_a[0]]
+        level_b = index_b._node_levels[nodes_b[0]]
+        if level_a > level_b:
+            children_a, _ = _expand(index_a, nodes_a)
+            children_b = np.repeat(nodes_b, index_a._node_counts[nodes_a])
+        elif level_b > level_a:
+            children_b, _ = _expand(index_b, nodes_b)
+            children_a = np.repeat(nodes_a, index_b._node_counts[nodes_b])
+        else:
+            # pair every child of node_a with every child of node_b
+            children_a, pairs_a = _expand(index_a, nodes_a)
+            expanded_b, _ = _expand(index_b, nodes_b)
+            counts_b = index_b._node_counts[nodes_b]
+            starts_b = np.cumsum(counts_b) - counts_b
+            repeats = counts_b[pairs_a]
+            offsets = np.arange(repeats.sum()) - np.repeat(
+                np.cumsum(repeats) - repeats, repeats
+            )
+            children_b = expanded_b[np.repeat(starts_b[pairs_a], repeats) + offsets]
+            children_a = np.repeat(children_a, repeats)
+
+        leaves = level_a == level_b == 0
+        if leaves:
+            bounds_a = index_a._entry_bounds[children_a]
+            bounds_b = index_b._entry_bounds[children_b]
+            matches = JOIN_PREDICATES[predicate](bounds_a, bounds_b)
+        else:
+            matches = _intersects(
+                index_a._node_bounds[children_a], index_b._node_bounds[children_b]
+            )
+        children_a, children_b = children_a[matches], children_b[matches]
+
+        if not leaves:
+            if len(children_a):
+                stack.append((children_a, children_b))
+            continue
+
+        pending_a.append(children_a)
+        pending_b.append(children_b)
+        pending_count += len(children_a)
+        if pending_count >= chunk_size:
+            entries_a, entries_b = np.concatenate(pending_a), np.concatenate(pending_b)
+            while len(entries_a) >= chunk_size:
+                yield entries_a[:chunk_size], entries_b[:chunk_size]
+                entries_a, entries_b = entries_a[chunk_size:], entries_b[chunk_size:]
+            pending_a, pending_b, pending_count = (
+                [entries_a],
+                [entries_b],
+                len(entries_a),
+            )
+
+    if pending_count:
+        yield np.concatenate(pending_a), np.concatenate(pending_b)
+
+
+def spatial_join(
+    index_a: ArrayIndex, index_b: ArrayIndex, predicate: str = "intersects"
+) -> Iterator[tuple[str, str]]:
+    """Yield (label_a, label_b) for every pair of entries matching the predicate."""
+    for entries_a, entries_b in spatial_join_chunks(index_a, index_b, predicate):
+        yield from zip(index_a.get_labels(entries_a), index_b.get_labels(entries_b))
+
+
+SHARDS_PER_WORKER = 4
+
+# the shared-memory block and the index mapped on top of it, set in each pool worker
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_index: Optional[ArrayIndex] = None
+
+
+def _attach_worker(name: str) -> None:
+    global _worker_memory, _worker_index
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    buffer = np.ndarray((_worker_memory.size,), dtype="u1", buffer=_worker_memory.buf)
+    _worker_index = ArrayIndex._load(buffer, read_only=True)
+
+
+def _search_shard(queries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return _worker_index.search_many(queries)  # type: ignore
+
+
+def _as_array_index(index: Union[Index, ArrayIndex]) -> ArrayIndex:
+    if isinstance(index, ArrayIndex):
+        return index
+    # insert-built trees are too deep to recurse through, and entries can have
+    # children of their own, so collect every labelled node with an explicit stack
+    entries, stack = [], [index.root] if index.root is not None else []
+    while stack:
+        node = stack.pop()
+        if node.label is not None:
+            entries.append(node)
+        stack.extend(node.children)
+    return ArrayIndex.bulk_load(
+        [entry.label for entry in entries],
+        np.array([entry.bounds for entry in entries]).reshape(-1, 4),
+        max(index.max_children, 8),
+    )
+
+
+class ParallelIndex:
+    """
+    Serve batches of queries from a pool of worker processes, to get around the GIL.
+
+    The tree is copied once, in the layout written by ArrayIndex.save, into a
+    multiprocessing.shared_memory block. Every worker maps that block as a read-only
+    ArrayIndex when it starts, so tasks only carry query shards and their hits and
+    the tree is never pickled. An Index is first repacked into an ArrayIndex.
+
+    Call close, or use it as a context manager, to stop the workers and free the
+    shared memory.
+    """
+
+    def __init__(
+        self, index: Union[Index, ArrayIndex], workers: Optional[int] = None
+    ) -> None:
+        self.index = _as_array_index(index)
+        self.workers = workers or os.cpu_count() or 1
+
+        parts = [np.frombuffer(part, dtype="u1") for part in self.index._dump()]
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=sum(len(part) for part in parts)
+        )
+        buffer = np.ndarray((self._memory.size,), dtype="u1", buffer=self._memory.buf)
+        np.concatenate(parts, out=buffer[: sum(len(part) for part in parts)])
+        del buffer
+
+        self._pool = multiprocessing.Pool(
+            self.workers, initializer=_attach_worker, initargs=(self._memory.name,)
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __enter__(self) -> "ParallelIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def search_many(self, bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Same as ArrayIndex.search_many, with the queries split into a few shards per
+        worker and answered in parallel.
+        """
+        queries = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        shard_count = min(len(queries), self.workers * SHARDS_PER_WORKER)
+        if not shard_count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        shards = np.array_split(queries, shard_count)
+        starts = np.cumsum([0] + [len(shard) for shard in shards[:-1]])
+        results = self._pool.map(_search_shard, shards)
+        query_idx = np.concatenate(
+            [
+                shard_queries + start
+                for (shard_queries, _), start in zip(results, starts)
+            ]
+        )
+        entry_idx = np.concatenate([shard_entries for _, shard_entries in results])
+        return query_idx, entry_idx
+
+    def get_labels(self, entries: np.ndarray) -> list[str]:
+        return self.index.get_labels(entries)
+
+    def close(self) -> None:
+        self._pool.terminate()
+        self._pool.join()
+        self._memory.close()
+        self._memory.unlink()
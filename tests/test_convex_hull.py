@@ -1,4 +1,5 @@
 import geojson
+import numpy as np
 import pytest
 
 from geospatial_algos.geospatial_algos import convex_hull  # type: ignore
@@ -79,3 +80,110 @@ def test_convex_hull(star_house):
         ],
         "type": "Polygon",
     }
+
+
+def test_convex_hull_array(star_house):
+    points = np.array(star_house["geometry"]["coordinates"][0])
+    hull = convex_hull.convex_hull_array(points, return_indices=True)
+    np.testing.assert_array_equal(hull, [5, 3, 1, 9, 7])
+    polygon = convex_hull.convex_hull_array(points)
+    assert (
+        np.array(polygon.exterior.coords).tolist()
+        == points[hull[[0, 1, 2, 3, 4, 0]]].tolist()
+    )
+
+
+def test_convex_hull_array__shared_angles_and_duplicates():
+    # a grid keeps many points on one ray from the anchor and on the hull's edges
+    points = np.array([(x, y) for x in range(5) for y in range(5)] * 2, dtype=float)
+    hull = convex_hull.convex_hull_array(points, return_indices=True)
+    assert points[hull].tolist() == [[0, 0], [0, 4], [4, 4], [4, 0]]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"prefilter": True}, {"method": "chan"}, {"method": "chan", "prefilter": True}],
+)
+def test_convex_hull_array__prefilter_and_chan(star_house, options):
+    points = np.array(star_house["geometry"]["coordinates"][0])
+    np.testing.assert_array_equal(
+        convex_hull.convex_hull_array(points, return_indices=True, **options),
+        [5, 3, 1, 9, 7],
+    )
+
+    # enough points for Chan's algorithm to wrap mini-hulls, and one with many corners
+    rng = np.random.default_rng(3)
+    angles = rng.uniform(0, 2 * np.pi, 2000)
+    for cloud in [
+        rng.normal(0, 1, size=(20_000, 2)),
+        np.column_stack([np.cos(angles), np.sin(angles)]),
+    ]:
+        np.testing.assert_array_equal(
+            convex_hull.convex_hull_array(cloud, return_indices=True, **options),
+            convex_hull.convex_hull_array(cloud, return_indices=True),
+        )
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"prefilter": True},
+        {"method": "chan"},
+        {"method": "chan", "prefilter": True},
+    ],
+)
+def test_convex_hull_array__collinear(options):
+    for points in [
+        [[0, 0], [1, 1], [2, 2]],
+        [[1, 2]] * 3,
+        [[0, 0], [2, 2], [1, 1]] * 50,
+    ]:
+        hull = convex_hull.convex_hull_array(points, return_indices=True, **options)
+        assert len(hull) <= 2
+        assert convex_hull.convex_hull_array(points, **options).is_empty
+
+
+def test_convex_hull_grouped(star_house):
+    points = np.array(star_house["geometry"]["coordinates"][0])
+    rng = np.random.default_rng(5)
+    cloud = rng.normal(10, 1, size=(500, 2))
+    all_points = np.vstack([points, cloud, [[0, 0], [1, 1], [2, 2]]])
+    group_ids = np.array(
+        ["star house"] * len(points) + ["cloud"] * len(cloud) + ["line"] * 3
+    )
+    hulls = convex_hull.convex_hull_grouped(all_points, group_ids)
+
+    assert sorted(hulls) == ["cloud", "line", "star house"]
+    np.testing.assert_array_equal(hulls.vertices("star house"), [5, 3, 1, 9, 7])
+    np.testing.assert_array_equal(
+        hulls.vertices("cloud"),
+        len(points) + convex_hull.convex_hull_array(cloud, return_indices=True),
+    )
+    assert hulls["line"].is_empty
+    with pytest.raises(KeyError):
+        hulls["missing"]
+
+    polygons = hulls.polygons()
+    assert all(polygon.equals(hulls[group]) for group, polygon in zip(hulls, polygons))
+
+
+def test_incremental_hull(star_house):
+    points = np.array(star_house["geometry"]["coordinates"][0])
+    hull = convex_hull.IncrementalHull(points[:2])
+    assert hull.polygon.is_empty
+    for batch in np.array_split(points[2:], 3):
+        hull.add(batch)
+    np.testing.assert_array_equal(hull.vertices, points[[5, 3, 1, 9, 7]])
+    assert hull.polygon.equals(convex_hull.convex_hull_array(points))
+
+    rng = np.random.default_rng(9)
+    stream = rng.normal(0, 1, size=(5000, 2))
+    hull = convex_hull.IncrementalHull(stream[:100])
+    for batch in np.array_split(stream[100:], 49):
+        hull.add(batch)
+    np.testing.assert_array_equal(
+        hull.vertices,
+        stream[convex_hull.convex_hull_array(stream, return_indices=True)],
+    )
+    assert hull.contains([[0, 0], [100, 100]]).tolist() == [True, False]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from geospatial_algos.geospatial_algos import geo_utils  # type: ignore
+
+ARRAY_ONLY = """
+import sys
+import numpy as np
+from {package} import convex_hull, line_simplification, rtree
+
+points = np.random.default_rng(0).uniform(0, 1, size=(100, 2))
+index = rtree.ArrayIndex.bulk_load([str(i) for i in range(100)], np.hstack([points] * 2))
+index.search_ids((0, 0, 0.5, 0.5))
+convex_hull.convex_hull_array(points, return_indices=True)
+line_simplification.simplify_mask(points, 0.1)
+print("shapely" in sys.modules, "geojson" in sys.modules)
+"""
+
+
+def test_lazy_shapely():
+    # a fresh interpreter, so nothing else has imported shapely yet
+    result = subprocess.run(
+        [sys.executable, "-c", ARRAY_ONLY.format(package=geo_utils.__package__)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    assert result.stdout.split() == ["False", "False"]
+
+    assert geo_utils.make_box(0, 0, 1, 1).bounds == (0, 0, 1, 1)
+    assert "make_box" in dir(geo_utils)
+    with pytest.raises(AttributeError):
+        geo_utils.make_circle
@@ -0,0 +1,168 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from geospatial_algos.geospatial_algos import ingest  # type: ignore
+from geospatial_algos.geospatial_algos import rtree  # type: ignore
+
+
+@pytest.fixture
+def features():
+    return [
+        {
+            "type": "Feature",
+            "properties": {"name": "Decatur"},
+            "geometry": {"type": "Point", "coordinates": [-73.9411, 40.6812]},
+        },
+        {
+            "type": "Feature",
+            "id": "fulton",
+            "properties": {},
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [[-73.95, 40.68], [-73.93, 40.681, 12.5]],
+            },
+        },
+        {
+            "type": "Feature",
+            "properties": {"name": "Fort Greene Park"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [[-73.98, 40.69], [-73.97, 40.69], [-73.97, 40.70], [-73.98, 40.69]]
+                ],
+            },
+        },
+        {"type": "Feature", "properties": {"name": "Nowhere"}, "geometry": None},
+        {
+            "type": "Feature",
+            "properties": {"name": "Islands"},
+            "geometry": {
+                "type": "MultiPolygon",
+                "coordinates": [
+                    [
+                        [
+                            [-74.02, 40.68],
+                            [-74.01, 40.68],
+                            [-74.01, 40.69],
+                            [-74.02, 40.68],
+                        ]
+                    ],
+                    [
+                        [
+                            [-74.05, 40.66],
+                            [-74.04, 40.66],
+                            [-74.04, 40.67],
+                            [-74.05, 40.66],
+                        ]
+                    ],
+                ],
+            },
+        },
+    ]
+
+
+EXPECTED_LABELS = ["Decatur", "fulton", "Fort Greene Park", "Islands"]
+EXPECTED_BOUNDS = [
+    [-73.9411, 40.6812, -73.9411, 40.6812],
+    [-73.95, 40.68, -73.93, 40.681],
+    [-73.98, 40.69, -73.97, 40.70],
+    [-74.05, 40.66, -74.01, 40.69],
+]
+
+
+def test_feature_bounds(features):
+    labels, bounds, present = ingest.feature_bounds(features)
+    assert labels == EXPECTED_LABELS
+    np.testing.assert_array_equal(bounds, EXPECTED_BOUNDS)
+    assert present.tolist() == [True, True, True, False, True]
+
+    labels, _, _ = ingest.feature_bounds(features[:1], label_property="ref", first_id=7)
+    assert labels == ["7"]
+
+
+@pytest.mark.parametrize("suffix", ["geojson", "ndjson"])
+def test_ingest(tmp_path, features, suffix):
+    path = tmp_path / f"stations.{suffix}"
+    if suffix == "ndjson":
+        path.write_text("\n".join(json.dumps(feature) for feature in features) + "\n")
+    else:
+        # members on either side of the features, pretty-printed across many chunks
+        collection = {"type": "FeatureCollection", "name": "brooklyn"}
+        collection["features"] = features
+        collection["bbox"] = [-74.05, 40.66, -73.93, 40.70]
+        path.write_text(json.dumps(collection, indent=2))
+
+    batches = list(ingest.read_batches(str(path), batch_size=2, chunk_size=16))
+    assert [len(labels) for labels, _, _ in batches] == [2, 1, 1]
+    assert sum(skipped for _, _, skipped in batches) == 1
+    assert [label for labels, _, _ in batches for label in labels] == EXPECTED_LABELS
+    np.testing.assert_array_equal(
+        np.vstack([bounds for _, bounds, _ in batches]), EXPECTED_BOUNDS
+    )
+
+    index, stats = ingest.ingest(str(path), batch_size=2)
+    assert isinstance(index, rtree.ArrayIndex)
+    assert (stats.features, stats.skipped) == (4, 1)
+    assert stats.features_per_second > 0
+    hits = index.search_ids((-73.98, 40.68, -73.94, 40.685))
+    assert sorted(index.get_labels(hits)) == ["Decatur", "fulton"]
+
+    existing = rtree.ArrayIndex()
+    existing.insert("Jackie Robinson", (-73.9285, 40.6807, -73.9285, 40.6807))
+    index, stats = ingest.ingest(str(path), index=existing)
+    assert index is existing and len(existing) == 5
+
+
+def test_ingest__repeated_labels(tmp_path, features):
+    path = tmp_path / "stations.ndjson"
+    repeated = [features[0], features[1], features[0], features[0], features[1]]
+    path.write_text("\n".join(json.dumps(feature) for feature in repeated))
+
+    index, stats = ingest.ingest(str(path), batch_size=2)
+    assert stats.features == 5 and index.max_children == ingest.MAX_CHILDREN
+    assert sorted(index.labels) == [
+        "Decatur",
+        "Decatur (2)",
+        "Decatur (3)",
+        "fulton",
+        "fulton (2)",
+    ]
+
+    existing = rtree.ArrayIndex()
+    existing.insert("Decatur", (-73.9411, 40.6812, -73.9411, 40.6812))
+    existing.insert("Decatur (2)", (-73.9411, 40.6812, -73.9411, 40.6812))
+    ingest.ingest(str(path), index=existing, batch_size=2)
+    assert len(existing) == 7
+    assert "Decatur (5)" in existing.labels and "fulton (2)" in existing.labels
+
+
+def test_iter_features__single_feature(tmp_path, features):
+    path = tmp_path / "decatur.json"
+    path.write_text(json.dumps(features[0]))
+    assert list(ingest.iter_features(str(path))) == features[:1]
+
+
+def test_iter_features__larger_than_chunk(tmp_path):
+    ring = [[x / 1000, (x % 7) / 1000] for x in range(20_000)] + [[0.0, 0.0]]
+    feature = {
+        "type": "Feature",
+        "properties": {"name": "Big"},
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+    text = json.dumps({"type": "FeatureCollection", "features": [feature]})
+
+    class CountingFile(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            CountingFile.reads += 1
+            return super().read(size)
+
+    reader = ingest._ChunkReader(CountingFile(text), chunk_size=64)
+    assert list(ingest._iter_collection(reader)) == [feature]
+    # the read size doubles until the feature fits, instead of len(text) / 64 reads
+    assert len(text) // 64 > 5000
+    assert CountingFile.reads < 20
@@ -0,0 +1,65 @@
+import numpy as np
+import shapely
+
+from geospatial_algos.geospatial_algos import convex_hull  # type: ignore
+from geospatial_algos.geospatial_algos import instrumentation  # type: ignore
+from geospatial_algos.geospatial_algos import line_simplification  # type: ignore
+from geospatial_algos.geospatial_algos import rtree  # type: ignore
+
+
+def test_disabled_by_default():
+    index = rtree.ArrayIndex()
+    index.insert("a", (0, 0, 1, 1))
+    index.search((0, 0, 1, 1))
+    assert not instrumentation.enabled
+    assert "rtree.ArrayIndex.insert" not in instrumentation.get_stats()
+
+
+def test_collect():
+    rng = np.random.default_rng(41)
+    points = rng.uniform(0, 1, size=(200, 2))
+    records = []
+
+    with instrumentation.collect(
+        lambda operation, seconds, counters: records.append(operation)
+    ) as stats:
+        index = rtree.Index()
+        array_index = rtree.ArrayIndex(max_children=4)
+        for idx, (x, y) in enumerate(points.tolist()):
+            index.insert(str(idx), (x, y, x, y))
+            array_index.insert(str(idx), (x, y, x, y))
+        index.search((0.2, 0.2, 0.4, 0.4))
+        array_index.search((0.2, 0.2, 0.4, 0.4))
+        line_simplification.simplify(shapely.LineString(points), 0.1)
+        convex_hull.convex_hull_array(points)
+    assert instrumentation.get_stats() is not stats
+    assert not instrumentation.enabled
+
+    assert sorted(set(records)) == sorted(stats.as_dict())
+    assert sorted(stats.as_dict()) == [
+        "convex_hull.convex_hull_array",
+        "line_simplification.douglas_peucker",
+        "rtree.ArrayIndex.insert",
+        "rtree.ArrayIndex.search_ids",
+        "rtree.Index.insert",
+        "rtree.Index.search",
+    ]
+    assert stats["rtree.Index.insert"].calls == 200
+    assert stats["rtree.Index.insert"].counters["root_growth"] > 0
+    assert stats["rtree.ArrayIndex.insert"].counters["splits"] > 0
+    # 200 entries in nodes of at most 4 children take at least four levels
+    assert stats["rtree.ArrayIndex.insert"].counters["root_growth"] >= 3
+
+    search = stats["rtree.ArrayIndex.search_ids"]
+    assert search.counters["results"] == len(
+        array_index.search_ids((0.2, 0.2, 0.4, 0.4))
+    )
+    assert search.counters["nodes_visited"] == array_index.nodes_visited
+    assert search.total_seconds == search.max_seconds > 0
+
+    simplify = stats["line_simplification.douglas_peucker"].counters
+    assert simplify["points"] == 200 and simplify["depth"] >= 1
+    assert simplify["distance_evaluations"] >= 198
+    hull = stats["convex_hull.convex_hull_array"].counters
+    assert hull["points_sorted"] == 200
+    assert hull["points_popped"] + hull["hull_vertices"] == 200
@@ -1,4 +1,5 @@
 import geojson
+import numpy as np
 import pytest
 
 from geospatial_algos.geospatial_algos import geo_utils  # type: ignore
@@ -65,22 +66,180 @@ def test_simplify(bk_bridge_park):
             [-73.995594, 40.703125],
             [-73.997969, 40.701524],
             [-73.996687, 40.70101],
-            [-73.999402, 40.700295],
-            [-73.997969, 40.698608],
-            [-74.000307, 40.698723],
+            [-73.997328, 40.699609],
+            [-73.999892, 40.699437],
+            [-73.998346, 40.698065],
+            [-74.000835, 40.697865],
             [-73.998723, 40.697122],
-            [-74.002381, 40.695692],
+            [-74.000269, 40.694978],
+            [-74.002947, 40.694778],
             [-74.00091, 40.694063],
             [-74.003324, 40.694029],
-            [-74.00167, 40.692606],
-            [-74.004422, 40.692504],
-            [-74.000696, 40.690617],
+            [-74.00201, 40.691859],
+            [-74.004747, 40.691731],
+            [-74.001051, 40.689972],
             [-74.005288, 40.691062],
-            [-74.003401, 40.689597],
+            [-74.003803, 40.688987],
             [-74.006355, 40.689632],
-            [-74.004669, 40.688194],
+            [-74.004993, 40.687579],
             [-74.007386, 40.688225],
             [-74.005797, 40.686132],
         ],
         "type": "LineString",
     }
+
+
+def test_simplify__matches_geos():
+    rng = np.random.default_rng(17)
+    trace = np.cumsum(rng.normal(0, 1, size=(5000, 2)), axis=0)
+    # rounding creates exact distance ties, which have to be broken the same way
+    for coords in [trace, np.round(trace)]:
+        line = geo_utils.LineString(coords)
+        for epsilon in [0.5, 2.0, 10.0]:
+            assert line_simplification.simplify(line, epsilon).equals_exact(
+                geo_utils.simplify(line, epsilon, preserve_topology=False), 0
+            )
+
+
+def test_simplify_mask__long_trace():
+    # deep enough to have hit the recursion limit when splits recursed
+    angles = np.linspace(0, 40 * np.pi, 20_000)
+    spiral = np.column_stack([angles * np.cos(angles), angles * np.sin(angles)])
+    keep = line_simplification.simplify_mask(spiral, epsilon=0.01)
+    assert keep[0] and keep[-1]
+    assert 2 < np.count_nonzero(keep) < len(spiral)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_simplify_many(bk_bridge_park, workers):
+    park = np.array(bk_bridge_park["geometry"]["coordinates"])
+    rng = np.random.default_rng(19)
+    trace = np.cumsum(rng.normal(0, 0.001, size=(300, 2)), axis=0)
+    lines = [park, np.empty((0, 2)), park[:1], trace, park[:2], trace[::-1]]
+    offsets = np.r_[0, np.cumsum([len(line) for line in lines])]
+
+    coords, simplified_offsets = line_simplification.simplify_many(
+        np.vstack(lines), offsets, epsilon=0.001, workers=workers
+    )
+    assert len(simplified_offsets) == len(offsets)
+    for idx, line in enumerate(lines):
+        np.testing.assert_array_equal(
+            coords[simplified_offsets[idx] : simplified_offsets[idx + 1]],
+            line[line_simplification.simplify_mask(line, epsilon=0.001)],
+        )
+
+    for lines in [[], [trace]]:
+        offsets = np.r_[0, np.cumsum([len(line) for line in lines])].astype(int)
+        coords = np.vstack(lines) if lines else np.empty((0, 2))
+        for actual, expected in zip(
+            line_simplification.simplify_many(coords, offsets, workers=workers),
+            line_simplification.simplify_many(coords, offsets),
+        ):
+            np.testing.assert_array_equal(actual, expected)
+
+
+def test_simplify_stream(bk_bridge_park):
+    park = bk_bridge_park["geometry"]["coordinates"]
+    simplified = list(line_simplification.simplify_stream(iter(park), epsilon=0.001))
+    assert simplified[0] == tuple(park[0]) and simplified[-1] == tuple(park[-1])
+    assert len(simplified) < len(park)
+    line = geo_utils.LineString(simplified)
+    assert all(
+        geo_utils.get_distance(line, geo_utils.Point(coord)) <= 0.001 + 1e-12
+        for coord in park
+    )
+
+    def endless_feed():
+        rng = np.random.default_rng(23)
+        while True:
+            yield tuple(rng.normal(0, 1, size=2))
+
+    # nothing waits for the end of the feed, and at most max_buffer points are held
+    vertices = line_simplification.simplify_stream(
+        endless_feed(), epsilon=100.0, max_buffer=10
+    )
+    assert len([next(vertices) for _ in range(50)]) == 50
+
+
+def test_visvalingam_importance():
+    coords = np.array([(0, 0), (1, 1), (2, 0), (3, 3), (4, 0), (5, 0.5), (6, 0)])
+    np.testing.assert_array_equal(
+        line_simplification.visvalingam_importance(coords),
+        [np.inf, 1, 3, 9, 3, 0.5, np.inf],
+    )
+    np.testing.assert_array_equal(
+        line_simplification.visvalingam_importance(coords[:2]), [np.inf, np.inf]
+    )
+
+
+def test_simplify_vw(bk_bridge_park):
+    original = geo_utils.from_geojson(geojson.dumps(bk_bridge_park))
+    importance = line_simplification.visvalingam_importance(original.coords)
+    for tolerance in [0.0, 1e-6, 1e-5, 1.0]:
+        simplified = line_simplification.simplify_vw(original, tolerance)
+        assert list(simplified.coords) == [
+            coord
+            for coord, area in zip(original.coords, importance)
+            if area > tolerance
+        ]
+    assert len(line_simplification.simplify_vw(original, 1.0).coords) == 2
+
+    # dropping the two 6.5 corners makes the line cross itself
+    hook = geo_utils.LineString(
+        [(1, 9), (6, 5), (9, 9), (7, 2), (2, 5), (1, 5), (2, 8)]
+    )
+    assert not line_simplification.simplify_vw(hook, 6.5).is_simple
+    preserved = line_simplification.simplify_vw(hook, 6.5, preserve_topology=True)
+    assert preserved.is_simple
+    assert list(preserved.coords) == [(1, 9), (6, 5), (9, 9), (7, 2), (1, 5), (2, 8)]
+
+
+def test_simplify_thresholds(bk_bridge_park):
+    rng = np.random.default_rng(31)
+    for coords in [
+        np.array(bk_bridge_park["geometry"]["coordinates"]),
+        np.round(np.cumsum(rng.normal(0, 1, size=(500, 2)), axis=0)),
+    ]:
+        thresholds = line_simplification.simplify_thresholds(coords)
+        assert thresholds[0] == thresholds[-1] == np.inf
+        for epsilon in [0.0, 0.0005, 0.001, 0.5, 2.0, 10.0]:
+            np.testing.assert_array_equal(
+                thresholds > epsilon,
+                line_simplification.simplify_mask(coords, epsilon),
+            )
+
+
+def test_simplification_cache(bk_bridge_park):
+    original = geo_utils.from_geojson(geojson.dumps(bk_bridge_park))
+    cache = line_simplification.SimplificationCache()
+    for epsilon in [0.0, 0.0005, 0.001, 0.0005]:
+        assert cache.simplify(original, epsilon).equals(
+            line_simplification.simplify(original, epsilon)
+        )
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries) == (3, 1, 1)
+    digest_bytes = line_simplification.CACHE_DIGEST_BYTES
+    assert info.size_bytes == len(original.coords) * 3 * 8 + digest_bytes
+
+    # room for two lines of this size: the least recently used one goes first
+    rng = np.random.default_rng(37)
+    lines = [rng.normal(0, 1, size=(100, 2)) for _ in range(3)]
+    cache = line_simplification.SimplificationCache(
+        max_bytes=2 * (100 * 3 * 8 + digest_bytes)
+    )
+    cache.simplify_mask(lines[0], 1.0)
+    cache.simplify_mask(lines[1], 1.0)
+    cache.simplify_mask(lines[0], 1.0)
+    cache.simplify_mask(lines[2], 1.0)
+    assert len(cache) == 2
+    cache.simplify_mask(lines[0], 1.0)
+    cache.simplify_mask(lines[1], 1.0)
+    assert cache.cache_info()[:3] == (2, 4, 2)
+
+    cache.clear()
+    cache.simplify_mask(lines[0], 1.0, key="road 1")
+    np.testing.assert_array_equal(
+        cache.simplify_mask(lines[1], 1.0, key="road 1"),
+        line_simplification.simplify_mask(lines[0], 1.0),
+    )
+    assert cache.cache_info()[:3] == (1, 1, 1)
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from geospatial_algos.geospatial_algos import geo_utils  # type: ignore
@@ -119,16 +120,13 @@ def test_find_parent_node(
 def test_search(
     jackie_robinson_node, decatur_node, south_oxford_node, fort_greene_node
 ):
-    # setup test data
+    # setup test data (branch nodes carry no label, labelled nodes are entries)
     fort_greene_clinton_hill_node = rtree.Node(
-        get_parent_bounds(fort_greene_node, south_oxford_node),
-        "Fort Greene / Clinton Hill",
-    )
-    bedstuy_node = rtree.Node(
-        get_parent_bounds(jackie_robinson_node, decatur_node), "BedStuy"
+        get_parent_bounds(fort_greene_node, south_oxford_node)
     )
+    bedstuy_node = rtree.Node(get_parent_bounds(jackie_robinson_node, decatur_node))
     root_node = rtree.Node(
-        get_parent_bounds(fort_greene_clinton_hill_node, bedstuy_node), "Root"
+        get_parent_bounds(fort_greene_clinton_hill_node, bedstuy_node)
     )
     root_node.children = [bedstuy_node, fort_greene_clinton_hill_node]
     bedstuy_node.children = [decatur_node, jackie_robinson_node]
@@ -254,3 +252,575 @@ def test_insert__entry_contained_in_current_bounds(jackie_robinson, decatur):
     assert len(jackie_node.children) == 1
     assert jackie_node.children[0].label == extract_name(jackie_robinson)
     assert jackie_node.bbox == geo_utils.make_box(*extract_bounds(jackie_robinson))
+
+
+def test_node__lazy_bbox(jackie_robinson, decatur, fort_greene):
+    node = rtree.Node(extract_bounds(decatur), extract_name(decatur))
+    assert not hasattr(node, "__dict__")
+    assert node.bounds == extract_bounds(decatur) and node._bbox is None
+    assert node.bbox == geo_utils.make_box(*extract_bounds(decatur))
+    assert node.bbox is node.bbox
+    node.update_bounds(extract_bounds(fort_greene))
+    assert node.bbox == geo_utils.make_box(*extract_bounds(fort_greene))
+
+    # branch nodes don't get labels, and neither bulk_load nor search builds a bbox
+    stations = [jackie_robinson, decatur, fort_greene]
+    idx = rtree.Index()
+    for station in stations:
+        idx.insert(extract_name(station), extract_bounds(station))
+    assert idx.root.label is None
+    idx = rtree.Index.bulk_load(
+        [extract_name(station) for station in stations],
+        np.array([extract_bounds(station) for station in stations]),
+    )
+    nodes = idx.search(extract_bounds(fort_greene))
+    assert [node.label for node in nodes] == [extract_name(fort_greene)]
+    assert idx.root._bbox is None and nodes[0]._bbox is None
+
+
+def test_array_index_search(jackie_robinson, decatur, south_oxford, fort_greene):
+    idx = rtree.ArrayIndex()
+    for station in [jackie_robinson, decatur, south_oxford, fort_greene]:
+        idx.insert(extract_name(station), extract_bounds(station))
+
+    nodes = idx.search(extract_bounds(decatur))
+    assert len(nodes) == 1
+    assert nodes[0].label == extract_name(decatur)
+    assert nodes[0].bbox == geo_utils.make_box(*extract_bounds(decatur))
+
+    # a box around bed-stuy picks up both bed-stuy stations
+    nodes = idx.search((-73.94, 40.68, -73.92, 40.69))
+    assert sorted(node.label for node in nodes) == [
+        extract_name(decatur),
+        extract_name(jackie_robinson),
+    ]
+
+
+def test_array_index_search__matches_brute_force():
+    rng = np.random.default_rng(0)
+    mins = rng.uniform(0, 1, size=(500, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.05, size=(500, 2))])
+    idx = rtree.ArrayIndex()
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    for query in np.hstack([mins[:50], mins[:50] + 0.1]).tolist():
+        expected = {
+            str(label)
+            for label, (minx, miny, maxx, maxy) in enumerate(bounds.tolist())
+            if minx <= query[2]
+            and maxx >= query[0]
+            and miny <= query[3]
+            and maxy >= query[1]
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+
+def test_index_search__matches_brute_force():
+    rng = np.random.default_rng(15)
+    mins = rng.uniform(0, 1, size=(500, 2))
+    # boxes large enough that later entries get nested under earlier ones
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.2, size=(500, 2))])
+    idx = rtree.Index()
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    assert len(idx.search((0, 0, 2, 2))) == len(bounds)
+    for query in np.hstack([mins[:100], mins[:100] + 0.05]).tolist():
+        expected = {
+            str(label)
+            for label, (minx, miny, maxx, maxy) in enumerate(bounds.tolist())
+            if minx <= query[2]
+            and maxx >= query[0]
+            and miny <= query[3]
+            and maxy >= query[1]
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+    idx = rtree.Index()
+    for label, entry_bounds in [
+        ("a", (0, 0, 1, 1)),
+        ("b", (2, 2, 3, 3)),
+        ("c", (2.5, 2.5, 5, 3)),
+    ]:
+        idx.insert(label, entry_bounds)
+    assert sorted(node.label for node in idx.search((2.6, 2.6, 2.7, 2.7))) == [
+        "b",
+        "c",
+    ]
+
+
+@pytest.mark.parametrize("packing", ["str", "hilbert"])
+def test_bulk_load__matches_insert(packing):
+    rng = np.random.default_rng(1)
+    mins = rng.uniform(0, 1, size=(300, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.05, size=(300, 2))])
+    labels = [str(label) for label in range(len(bounds))]
+
+    inserted = rtree.ArrayIndex()
+    for label, entry_bounds in zip(labels, bounds.tolist()):
+        inserted.insert(label, entry_bounds)
+    packed = rtree.ArrayIndex.bulk_load(labels, bounds, packing=packing)
+    packed_nodes = rtree.Index.bulk_load(labels, bounds, packing=packing)
+
+    # every node except the last one on each level is full
+    assert packed._node_count < inserted._node_count
+    for query in np.hstack([mins[:40], mins[:40] + 0.1]).tolist():
+        expected = {node.label for node in inserted.search(query)}
+        assert {node.label for node in packed.search(query)} == expected
+        assert {node.label for node in packed_nodes.search(query)} == expected
+
+    leaf_labels = [
+        node.label for node in packed_nodes.get_leaf_nodes(packed_nodes.root)
+    ]
+    assert sorted(leaf_labels) == sorted(labels)
+
+
+def test_bulk_load__single_entry(decatur):
+    idx = rtree.Index.bulk_load([extract_name(decatur)], [extract_bounds(decatur)])
+    assert len(idx.root.children) == 1
+    assert idx.root.children[0].label == extract_name(decatur)
+
+    idx = rtree.ArrayIndex.bulk_load([extract_name(decatur)], [extract_bounds(decatur)])
+    assert [node.label for node in idx.search(extract_bounds(decatur))] == [
+        extract_name(decatur)
+    ]
+
+
+@pytest.mark.parametrize("split", ["linear", "quadratic", "rstar"])
+def test_array_index_split_policies(split):
+    rng = np.random.default_rng(2)
+    mins = rng.uniform(0, 1, size=(400, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.02, size=(400, 2))])
+    idx = rtree.ArrayIndex(max_children=6, min_children=2, split=split)
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    # every node except the root respects the fill limits
+    counts = idx._node_counts[: idx._node_count]
+    non_root = np.arange(idx._node_count) != idx.root
+    assert np.all(counts[non_root] >= 2)
+    assert np.all(counts <= 6)
+
+    for query in np.hstack([mins[:40], mins[:40] + 0.1]).tolist():
+        expected = {
+            str(label)
+            for label in np.flatnonzero(
+                (bounds[:, 0] <= query[2])
+                & (bounds[:, 2] >= query[0])
+                & (bounds[:, 1] <= query[3])
+                & (bounds[:, 3] >= query[1])
+            )
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+
+def test_array_index_rstar__small_fan_out():
+    # clustered boxes at M=4, where a min_children of 1 piled up one-child nodes
+    rng = np.random.default_rng(16)
+    centres = rng.uniform(0, 1, size=(30, 2))
+    mins = centres[rng.integers(0, 30, 1500)] + rng.normal(0, 0.025, size=(1500, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.02, size=(1500, 2))])
+    idx = rtree.ArrayIndex(max_children=4, split="rstar")
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    assert idx.min_children == 2
+    assert idx.height <= 8 and idx._node_count < len(bounds) * 2 / 3
+    counts = idx._node_counts[: idx._node_count]
+    assert np.all(counts[np.arange(idx._node_count) != idx.root] >= 2)
+
+
+def test_index_max_children(jackie_robinson, decatur, fort_greene):
+    idx = rtree.Index(max_children=3)
+    for station in [decatur, jackie_robinson, fort_greene]:
+        idx.insert(extract_name(station), extract_bounds(station))
+
+    assert len(idx.root.children) == 3
+
+
+@pytest.mark.parametrize("split", ["linear", "quadratic"])
+@pytest.mark.parametrize("bulk", [False, True])
+def test_index_split_policies__points(split, bulk):
+    # zero-area boxes, which GEOS can't union
+    rng = np.random.default_rng(14)
+    points = rng.uniform(0, 1, size=(400, 2))
+    if bulk:
+        # the policy carries over to entries inserted after a bulk load
+        idx = rtree.Index.bulk_load(
+            [str(label) for label in range(200)],
+            np.hstack([points[:200], points[:200]]),
+            max_children=4,
+            split=split,
+        )
+    else:
+        idx = rtree.Index(max_children=4, split=split)
+    assert (idx.min_children, idx.split) == (2, split)
+    for label, (x, y) in enumerate(points.tolist()[200 if bulk else 0 :]):
+        idx.insert(str(label + (200 if bulk else 0)), (x, y, x, y))
+
+    for query in np.hstack([points[:100], points[:100] + 0.1]).tolist():
+        expected = {
+            str(label)
+            for label, (x, y) in enumerate(points.tolist())
+            if query[0] <= x <= query[2] and query[1] <= y <= query[3]
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+
+def test_index__no_rstar():
+    with pytest.raises(AssertionError, match="R\\* needs ArrayIndex"):
+        rtree.Index(max_children=4, split="rstar")
+
+
+def test_search__prunes_non_intersecting_children():
+    rng = np.random.default_rng(3)
+    points = rng.uniform(0, 1, size=(256, 2))
+    labels = [str(label) for label in range(len(points))]
+    idx = rtree.Index.bulk_load(labels, np.hstack([points, points]))
+
+    # a small query straddling the middle of the dataset
+    query = (0.49, 0.49, 0.51, 0.51)
+    nodes = idx.search(query)
+    assert {node.label for node in nodes} == {
+        str(label)
+        for label, (x, y) in enumerate(points.tolist())
+        if 0.49 <= x <= 0.51 and 0.49 <= y <= 0.51
+    }
+    internal_node_count = len(points) - 1
+    assert 0 < idx.nodes_visited < internal_node_count / 4
+
+    assert idx.search((2, 2, 3, 3)) == []
+    assert idx.nodes_visited == 0
+
+
+def test_search_many__matches_search():
+    rng = np.random.default_rng(4)
+    mins = rng.uniform(0, 1, size=(500, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.02, size=(500, 2))])
+    idx = rtree.ArrayIndex(max_children=8)
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    query_mins = rng.uniform(-0.1, 1, size=(60, 2))
+    queries = np.hstack([query_mins, query_mins + 0.1])
+    query_idx, entry_idx = idx.search_many(queries)
+
+    assert np.all(np.diff(query_idx) >= 0)
+    offsets = np.searchsorted(query_idx, np.arange(len(queries) + 1))
+    for query, start, end in zip(queries, offsets[:-1], offsets[1:]):
+        assert sorted(entry_idx[start:end]) == sorted(idx.search_ids(query))
+
+    empty_idx, empty_entries = rtree.ArrayIndex().search_many(queries)
+    assert len(empty_idx) == len(empty_entries) == 0
+
+
+def test_index_search_many():
+    rng = np.random.default_rng(17)
+    mins = rng.uniform(0, 1, size=(300, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.1, size=(300, 2))])
+    idx = rtree.Index(max_children=4)
+    for label, entry_bounds in enumerate(bounds[:200].tolist()):
+        idx.insert(str(label), entry_bounds)
+    queries = np.hstack([mins[:40], mins[:40] + 0.05])
+
+    hits = []
+    for inserts in [bounds[200:250], bounds[250:]]:
+        query_idx, entry_idx = idx.search_many(queries)
+        for query, query_bounds in enumerate(queries.tolist()):
+            assert sorted(idx.get_labels(entry_idx[query_idx == query])) == sorted(
+                node.label for node in idx.search(query_bounds)
+            )
+        hits.append(len(entry_idx))
+        # the next batch sees the entries inserted since this one
+        for entry_bounds in inserts.tolist():
+            idx.insert(str(len(idx.labels)), entry_bounds)
+    assert hits[0] < hits[1]
+
+
+def test_nearest(jackie_robinson, decatur, south_oxford, fort_greene):
+    idx = rtree.ArrayIndex()
+    for station in [jackie_robinson, decatur, south_oxford, fort_greene]:
+        idx.insert(extract_name(station), extract_bounds(station))
+
+    # a rider at the corner of dekalb and classon
+    neighbours = list(idx.nearest((-73.9598, 40.6896), k=2))
+    assert [label for label, _ in neighbours] == [
+        extract_name(south_oxford),
+        extract_name(fort_greene),
+    ]
+    assert neighbours[0][1] < neighbours[1][1]
+
+    assert list(idx.nearest((-73.9598, 40.6896), k=None, max_distance=0.001)) == []
+
+
+def test_nearest__matches_brute_force():
+    rng = np.random.default_rng(5)
+    points = rng.uniform(0, 1, size=(400, 2))
+    idx = rtree.ArrayIndex.bulk_load(
+        [str(label) for label in range(len(points))],
+        np.hstack([points, points]),
+        max_children=8,
+    )
+
+    for target in rng.uniform(0, 1, size=(20, 2)):
+        distances = np.hypot(*(points - target).T)
+        expected = [str(label) for label in np.argsort(distances)[:5]]
+        neighbours = list(idx.nearest(tuple(target), k=5))
+        assert [label for label, _ in neighbours] == expected
+        assert np.allclose([d for _, d in neighbours], np.sort(distances)[:5])
+
+        within = list(idx.nearest(tuple(target), k=None, max_distance=0.1))
+        assert len(within) == np.count_nonzero(distances <= 0.1)
+
+    # the generator can be consumed lazily
+    neighbours = idx.nearest((0.5, 0.5), k=None)
+    assert next(neighbours)[1] <= next(neighbours)[1]
+
+
+def test_index_nearest():
+    rng = np.random.default_rng(18)
+    mins = rng.uniform(0, 1, size=(400, 2))
+    # boxes large enough that inserts nest entries under entries
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.2, size=(400, 2))])
+    idx = rtree.Index(max_children=4)
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        idx.insert(str(label), entry_bounds)
+
+    for target in rng.uniform(-0.2, 1.2, size=(20, 2)):
+        gaps = np.maximum(bounds[:, :2] - target, 0) + np.maximum(
+            target - bounds[:, 2:], 0
+        )
+        distances = np.hypot(*gaps.T)
+        neighbours = list(idx.nearest(tuple(target), k=10))
+        assert np.allclose([d for _, d in neighbours], np.sort(distances)[:10])
+        assert all(distances[int(label)] == d for label, d in neighbours)
+
+        within = list(idx.nearest(tuple(target), k=None, max_distance=0.05))
+        assert sorted(int(label) for label, _ in within) == sorted(
+            np.flatnonzero(distances <= 0.05).tolist()
+        )
+
+    assert list(rtree.Index().nearest((0, 0))) == []
+
+
+@pytest.mark.parametrize("cls", [rtree.Index, rtree.ArrayIndex])
+def test_delete_and_update(cls, jackie_robinson, decatur, south_oxford, fort_greene):
+    idx = cls()
+    for station in [jackie_robinson, decatur, south_oxford, fort_greene]:
+        idx.insert(extract_name(station), extract_bounds(station))
+
+    idx.delete(extract_name(decatur))
+    assert idx.search(extract_bounds(decatur)) == []
+    assert extract_name(decatur) not in idx.labels
+
+    # the train pulls out of south oxford towards fort greene
+    idx.update(extract_name(south_oxford), extract_bounds(fort_greene))
+    nodes = idx.search(extract_bounds(fort_greene))
+    assert sorted(node.label for node in nodes) == [
+        extract_name(fort_greene),
+        extract_name(south_oxford),
+    ]
+    assert idx.search(extract_bounds(south_oxford)) == []
+
+    # deleted labels can be reused
+    idx.insert(extract_name(decatur), extract_bounds(decatur))
+    assert [node.label for node in idx.search(extract_bounds(decatur))] == [
+        extract_name(decatur)
+    ]
+
+
+def test_delete_and_update__stream_of_changes():
+    rng = np.random.default_rng(6)
+    positions = {str(label): rng.uniform(0, 1, size=2) for label in range(300)}
+    idx = rtree.ArrayIndex(max_children=6)
+    for label, (x, y) in positions.items():
+        idx.insert(label, (x, y, x, y))
+    capacity = len(idx._entry_bounds)
+
+    for _ in range(2000):
+        label = str(rng.integers(300))
+        if label not in positions:
+            positions[label] = rng.uniform(0, 1, size=2)
+            idx.insert(label, (*positions[label], *positions[label]))
+        elif rng.random() < 0.2:
+            del positions[label]
+            idx.delete(label)
+        else:
+            positions[label] = positions[label] + rng.normal(0, 0.02, size=2)
+            idx.update(label, (*positions[label], *positions[label]))
+
+    # freed rows are reused, so the arrays don't grow
+    assert len(idx._entry_bounds) == capacity
+    assert len(idx) == len(positions)
+    for x, y in rng.uniform(0, 1, size=(30, 2)):
+        query = (x, y, x + 0.1, y + 0.1)
+        expected = {
+            label
+            for label, (px, py) in positions.items()
+            if x <= px <= x + 0.1 and y <= py <= y + 0.1
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+    for label in list(positions):
+        idx.delete(label)
+    assert idx.root == -1
+    assert idx.search((0, 0, 1, 1)) == []
+
+
+def test_index_delete_and_update__stream_of_changes():
+    rng = np.random.default_rng(19)
+    # boxes large enough that inserts nest entries under entries
+    boxes = {str(label): rng.uniform(0, 1, size=2) for label in range(200)}
+    sizes = {label: rng.uniform(0, 0.2, size=2) for label in boxes}
+    idx = rtree.Index(max_children=4)
+    for label, mins in boxes.items():
+        idx.insert(label, (*mins, *(mins + sizes[label])))
+
+    for _ in range(600):
+        label = str(rng.integers(200))
+        if label not in boxes:
+            boxes[label] = rng.uniform(0, 1, size=2)
+            idx.insert(label, (*boxes[label], *(boxes[label] + sizes[label])))
+        elif rng.random() < 0.3:
+            del boxes[label]
+            idx.delete(label)
+        else:
+            boxes[label] = boxes[label] + rng.normal(0, 0.05, size=2)
+            idx.update(label, (*boxes[label], *(boxes[label] + sizes[label])))
+
+    assert set(idx.labels) == set(boxes)
+    for x, y in rng.uniform(0, 1, size=(30, 2)):
+        query = (x, y, x + 0.1, y + 0.1)
+        expected = {
+            label
+            for label, (minx, miny) in boxes.items()
+            if minx <= x + 0.1
+            and minx + sizes[label][0] >= x
+            and miny <= y + 0.1
+            and miny + sizes[label][1] >= y
+        }
+        assert {node.label for node in idx.search(query)} == expected
+
+    for label in list(boxes):
+        idx.delete(label)
+    assert idx.root is None
+    idx.insert("again", (0, 0, 1, 1))
+    assert [node.label for node in idx.search((0, 0, 1, 1))] == ["again"]
+
+
+def test_spatial_join():
+    rng = np.random.default_rng(7)
+    pings = rng.uniform(0, 1, size=(1000, 2))
+    zone_mins = rng.uniform(0, 1, size=(40, 2))
+    zones = np.hstack([zone_mins, zone_mins + rng.uniform(0, 0.2, size=(40, 2))])
+    ping_index = rtree.ArrayIndex.bulk_load(
+        [f"ping {idx}" for idx in range(len(pings))],
+        np.hstack([pings, pings]),
+        max_children=16,
+    )
+    zone_index = rtree.ArrayIndex(max_children=4)
+    for idx, zone_bounds in enumerate(zones.tolist()):
+        zone_index.insert(f"zone {idx}", zone_bounds)
+
+    expected = {
+        (f"ping {ping}", f"zone {zone}")
+        for ping, (x, y) in enumerate(pings.tolist())
+        for zone, (minx, miny, maxx, maxy) in enumerate(zones.tolist())
+        if minx <= x <= maxx and miny <= y <= maxy
+    }
+    pairs = list(rtree.spatial_join(ping_index, zone_index, predicate="within"))
+    assert len(pairs) == len(expected)
+    assert set(pairs) == expected
+
+    reversed_pairs = rtree.spatial_join(zone_index, ping_index, predicate="contains")
+    assert {(ping, zone) for zone, ping in reversed_pairs} == expected
+
+    chunks = list(rtree.spatial_join_chunks(ping_index, zone_index, chunk_size=50))
+    assert all(len(entries_a) <= 50 for entries_a, _ in chunks)
+    assert sum(len(entries_a) for entries_a, _ in chunks) == len(expected)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_open(tmp_path, mmap):
+    rng = np.random.default_rng(11)
+    mins = rng.uniform(0, 1, size=(300, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.05, size=(300, 2))])
+    index = rtree.ArrayIndex.bulk_load(
+        [f"café {idx}" for idx in range(300)], bounds, max_children=8
+    )
+    for idx in range(0, 300, 7):
+        index.delete(f"café {idx}")
+    path = tmp_path / "index.idx"
+    index.save(str(path))
+
+    opened = rtree.ArrayIndex.open(str(path), mmap=mmap)
+    assert len(opened) == len(index)
+    assert ("café 7" in opened.labels) is False
+    assert ("café 8" in opened.labels) is True
+    queries = np.array([[0.1, 0.1, 0.4, 0.3], [0.5, 0.5, 0.9, 0.9]])
+    for query_bounds in queries.tolist():
+        assert sorted(node.label for node in opened.search(query_bounds)) == sorted(
+            node.label for node in index.search(query_bounds)
+        )
+    assert list(opened.nearest((0.5, 0.5), k=5)) == list(index.nearest((0.5, 0.5), k=5))
+
+    if mmap:
+        with pytest.raises(AssertionError):
+            opened.insert("new", (0, 0, 0, 0))
+    else:
+        opened.insert("new", (2, 2, 2, 2))
+        assert [node.label for node in opened.search((1.5, 1.5, 2.5, 2.5))] == ["new"]
+
+
+def test_index_save(tmp_path):
+    rng = np.random.default_rng(20)
+    mins = rng.uniform(0, 1, size=(200, 2))
+    bounds = np.hstack([mins, mins + rng.uniform(0, 0.1, size=(200, 2))])
+    index = rtree.Index(max_children=4)
+    for label, entry_bounds in enumerate(bounds.tolist()):
+        index.insert(str(label), entry_bounds)
+    index.delete("7")
+    path = tmp_path / "index.idx"
+    index.save(str(path))
+
+    opened = rtree.ArrayIndex.open(str(path))
+    assert set(opened.labels) == set(index.labels)
+    for query_bounds in np.hstack([mins[:20], mins[:20] + 0.05]).tolist():
+        assert sorted(node.label for node in opened.search(query_bounds)) == sorted(
+            node.label for node in index.search(query_bounds)
+        )
+
+
+def test_parallel_index():
+    rng = np.random.default_rng(13)
+    mins = rng.uniform(0, 1, size=(2000, 2))
+    bounds = np.hstack([mins, mins + 0.01])
+    labels = [f"poi {idx}" for idx in range(len(bounds))]
+    queries = np.hstack([mins[:300], mins[:300] + 0.03])
+    index = rtree.ArrayIndex.bulk_load(labels, bounds, max_children=8)
+
+    with rtree.ParallelIndex(index, workers=2) as parallel:
+        for actual, expected in zip(
+            parallel.search_many(queries), index.search_many(queries)
+        ):
+            np.testing.assert_array_equal(actual, expected)
+
+    legacy = rtree.Index.bulk_load(labels[:200], bounds[:200], max_children=4)
+    # entries nested under entries, as inserts produce, deeper than the recursion
+    # limit
+    nested = rtree.Index()
+    nested.root = node = rtree.Node((0, 0, 1, 1))
+    for depth, label in enumerate(labels):
+        margin = depth / len(labels) / 2
+        child = rtree.Node((margin, margin, 1 - margin, 1 - margin), label)
+        node.add_child(child)
+        nested.labels[label] = node = child
+    for tree in [legacy, nested]:
+        with rtree.ParallelIndex(tree, workers=2) as parallel:
+            assert len(parallel) == len(tree.labels)
+            query_idx, entry_idx = parallel.search_many(queries[:20])
+            for idx, query_bounds in enumerate(queries[:20].tolist()):
+                assert sorted(
+                    parallel.get_labels(entry_idx[query_idx == idx])
+                ) == sorted(node.label for node in tree.search(query_bounds))
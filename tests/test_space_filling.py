@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from geospatial_algos.geospatial_algos import space_filling  # type: ignore
+
+
+@pytest.fixture
+def cells():
+    # every cell of an 8 x 8 grid, as points on a grid laid over (0, 0, 8, 8)
+    return np.array([(x, y) for x in range(8) for y in range(8)], dtype=np.float64)
+
+
+def test_morton_codes(cells):
+    codes = space_filling.morton_codes(cells, bits=3, extent=(0, 0, 8, 8))
+    assert sorted(codes.tolist()) == list(range(64))
+    # x takes the even bits and y the odd ones
+    lookup = dict(zip(map(tuple, cells.tolist()), codes.tolist()))
+    expected = {(1, 0): 1, (0, 1): 2, (1, 1): 3, (2, 0): 4, (7, 7): 63}
+    assert {cell: lookup[cell] for cell in expected} == expected
+
+
+def test_hilbert_codes(cells):
+    codes = space_filling.hilbert_codes(cells, bits=3, extent=(0, 0, 8, 8))
+    assert sorted(codes.tolist()) == list(range(64))
+    # the curve starts and ends in the bottom corners, one cell at a time
+    path = cells[np.argsort(codes)]
+    assert path[0].tolist() == [0, 0] and path[-1].tolist() == [7, 0]
+    assert (np.abs(np.diff(path, axis=0)).sum(axis=1) == 1).all()
+
+
+def test_codes__own_extent():
+    points = np.array([[-74.0, 40.7], [-73.9, 40.8], [-73.9, 40.8], [-74.0, 40.8]])
+    for codes in [
+        space_filling.hilbert_codes(points, bits=32),
+        space_filling.morton_codes(points, bits=32),
+    ]:
+        assert codes.dtype == np.uint64
+        assert codes[0] == 0 and codes[1] == codes[2]
+    # all points on a line still spread out along the curve
+    line = np.array([[0.0, 1.0], [0.5, 1.0], [1.0, 1.0]])
+    assert len(set(space_filling.hilbert_codes(line).tolist())) == 3
+    assert len(space_filling.morton_codes(np.empty((0, 2)))) == 0
+
+
+@pytest.mark.parametrize("curve", ["hilbert", "morton"])
+def test_curve_order(curve):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 1, size=(2000, 2))
+    order = space_filling.curve_order(points, curve)
+    assert sorted(order.tolist()) == list(range(len(points)))
+
+    # consecutive points along the curve are far closer than in arbitrary order
+    along = np.linalg.norm(np.diff(points[order], axis=0), axis=1).mean()
+    arbitrary = np.linalg.norm(np.diff(points, axis=0), axis=1).mean()
+    assert along < arbitrary / 10
+
+    # boxes are ordered by their centres
+    boxes = np.hstack([points - 0.01, points + 0.01])
+    np.testing.assert_array_equal(space_filling.curve_order(boxes, curve), order)